@@ -1,16 +1,31 @@
-import tempfile
+import hashlib
+import os
+import shutil
+import subprocess  # noqa: S404
 
 import nox
 
-nox.options.sessions = "lint", "mypy", "tests"
+nox.options.sessions = "lint", "mypy", "tests", "mypyc"
+# Reuse session virtualenvs across runs, as if with -r, so that repeated local
+# runs do not reinstall everything. CI always starts without a .nox directory,
+# so it still gets a cold run.
+nox.options.reuse_existing_virtualenvs = True
 
 locations = "src", "tests", "noxfile.py"
 package = "tuf_on_a_plane"
 pythons = ["3.9"]
 
 
-def install_with_constraints(session, *args, **kwargs):
-    with tempfile.NamedTemporaryFile() as requirements:
+def _export_requirements(session):
+    """Export the locked requirements once per version of poetry.lock, and
+    return the path to them."""
+    with open("poetry.lock", "rb") as lockfile:
+        digest = hashlib.sha256(lockfile.read()).hexdigest()
+
+    cache_dir = os.path.join(".nox", "_cache")
+    requirements = os.path.join(cache_dir, f"requirements-{digest}.txt")
+    if not os.path.isfile(requirements):
+        os.makedirs(cache_dir, exist_ok=True)
         session.run(
             "poetry",
             "export",
@@ -18,10 +33,19 @@ def install_with_constraints(session, *args, **kwargs):
             # https://github.com/python-poetry/poetry/issues/3472#issuecomment-744356551
             "--without-hashes",
             "--format=requirements.txt",
-            f"--output={requirements.name}",
+            f"--output={requirements}",
             external=True,
         )
-        session.install(f"--constraint={requirements.name}", *args, **kwargs)
+    return requirements
+
+
+def install_with_constraints(session, *args, **kwargs):
+    requirements = _export_requirements(session)
+    session.install(
+        f"--constraint={requirements}",
+        *args,
+        **kwargs,
+    )
 
 
 @nox.session(python=pythons[0])
@@ -58,6 +82,80 @@ def tests(session):
     args = session.posargs or ["--cov", "-m", "not e2e"]
     session.run("poetry", "install", "--no-dev", external=True)
     install_with_constraints(
-        session, "coverage[toml]", "pytest", "pytest-cov", "pytest-mock"
+        session,
+        "coverage[toml]",
+        "pytest",
+        "pytest-cov",
+        "pytest-mock",
+        "securesystemslib",
     )
     session.run("pytest", *args)
+
+
+@nox.session(python=pythons)
+def mypyc(session):
+    """Compile the JSON parser with mypyc, and run the tests against that build,
+    so that the compiled path is exercised, and not only the pure Python one."""
+    lib = os.path.join(session.create_tmp(), "lib")
+    shutil.rmtree(lib, ignore_errors=True)
+    shutil.copytree(
+        os.path.join("src", package),
+        os.path.join(lib, package),
+        ignore=shutil.ignore_patterns("__pycache__"),
+    )
+
+    session.run("poetry", "install", "--no-dev", "--no-root", external=True)
+    install_with_constraints(
+        session, "mypy", "pytest", "pytest-mock", "securesystemslib"
+    )
+    env = {"TUF_ON_A_PLANE_USE_MYPYC": "1", "PYTHONPATH": lib}
+    session.run(
+        "python",
+        "setup.py",
+        "build_ext",
+        f"--build-lib={lib}",
+        f"--build-temp={os.path.join(session.create_tmp(), 'temp')}",
+        env=env,
+    )
+    # Make sure that we test the extension module, and not the source next to it.
+    session.run(
+        "python",
+        "-c",
+        f"import {package}.parsers.json as m; assert not m.__file__.endswith('.py')",
+        env=env,
+    )
+    session.run("pytest", *(session.posargs or ["-m", "not e2e"]), env=env)
+
+
+@nox.session(name="all", python=False)
+def all_sessions(session):
+    """Run the static checks concurrently in separate nox processes, and then
+    the tests, which get the CPU to themselves."""
+    tests = ("tests", "mypyc")
+    # Export requirements up front, so that the checks do not race to do it.
+    _export_requirements(session)
+
+    log_dir = os.path.join(".nox", "_logs")
+    os.makedirs(log_dir, exist_ok=True)
+
+    checks = [name for name in nox.options.sessions if name not in tests]
+    processes = []
+    for name in checks:
+        # Capture each session separately, so that their output does not
+        # interleave.
+        log = open(os.path.join(log_dir, f"{name}.log"), "w")
+        process = subprocess.Popen(  # noqa: S603,S607
+            ["nox", "--session", name], stdout=log, stderr=subprocess.STDOUT
+        )
+        processes.append((name, process, log))
+
+    failed = []
+    for name, process, log in processes:
+        if process.wait() != 0:
+            failed.append(name)
+        log.close()
+        session.log(f"{name}: see {log.name}")
+    if failed:
+        session.error(f"failed: {', '.join(failed)}")
+
+    session.run("nox", "--session", *tests, external=True)
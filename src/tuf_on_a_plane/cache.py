@@ -0,0 +1,39 @@
+"""A bounded cache, for the few results that we compute again and again."""
+
+from collections import OrderedDict
+import threading
+from typing import Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """A mapping of at most maxsize entries, which evicts the least recently
+    used entry first. It is safe to share between threads.
+
+    It cannot tell a cached None from a miss, so do not cache None."""
+
+    __slots__ = ("maxsize", "__data", "__lock")
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.__data: "OrderedDict[K, V]" = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key: K) -> Optional[V]:
+        with self.__lock:
+            value = self.__data.get(key)
+            if value is not None:
+                self.__data.move_to_end(key)
+            return value
+
+    def put(self, key: K, value: V) -> None:
+        with self.__lock:
+            self.__data[key] = value
+            self.__data.move_to_end(key)
+            if len(self.__data) > self.maxsize:
+                self.__data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.__data)
@@ -1,5 +1,4 @@
-from dataclasses import dataclass
-import os
+from dataclasses import dataclass, field
 import shutil
 import tempfile
 
@@ -25,7 +24,8 @@ class Config:
     targets_cache: Dir
 
     # Where to store temporary files.
-    temp_dir = tempfile.mkdtemp()
+    # NOTE: Each instance gets its own directory, created when the instance is.
+    temp_dir: Dir = field(default_factory=tempfile.mkdtemp)
 
     # Maximum number of unique targets roles to visit per target.
     MAX_PREORDER_DFS_VISITS = Positive(2 ** 5)
@@ -42,12 +42,15 @@ class Config:
 
     # A fixed notion of "now" with some slack time:
     # https://github.com/theupdateframework/specification/pull/118
-    NOW: DateTime = DateTime.laggingnow(minutes=5)
+    # NOTE: This is set per instance in __post_init__, not at import time.
+    NOW: DateTime = field(init=False)
 
     # Minimum number of bytes per second that must be downloaded per second
     # *per chunk* to prevent raising a slow retrieval attack.
     SLOW_RETRIEVAL_THRESHOLD: Speed = Speed(2 ** 13)
 
+    def __post_init__(self) -> None:
+        self.NOW = DateTime.laggingnow(minutes=5)
+
     def close(self) -> None:
-        if os.path.isdir(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
@@ -1,23 +1,37 @@
+import atexit
+import itertools
+import os
 import tempfile
-from typing import IO, Tuple
-
-import httpx
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, TYPE_CHECKING
 
 from . import __version__
 from .config import Config
 from .exceptions import (
+    DownloadError,
     DownloadNotFoundError,
     EndlessDataAttack,
     SlowRetrievalAttack,
 )
 from .models.common import (
-    DateTime,
     Filepath,
     Length,
-    Speed,
     Url,
 )
 
+# NOTE: Shared by all downloaders, so that names are unique within a process
+# even if several of them share a temporary directory.
+_temp_counter = itertools.count()
+# NOTE: Some platforms, such as Windows, cannot open files relative to a
+# directory descriptor, so there we fall back to tempfile.mkstemp.
+_HAS_DIR_FD = os.open in os.supports_dir_fd and hasattr(os, "O_DIRECTORY")
+
+# NOTE: httpx imports dozens of modules, so we import it only when we first
+# need it, which code that only reads cached metadata never does.
+if TYPE_CHECKING:
+    import httpx
+
 
 class DownloaderMixIn:
     """A mixin to separate download functions."""
@@ -37,13 +51,21 @@ class DownloaderMixIn:
         raise NotImplementedError
 
 
-class HTTPXDownloaderMixIn(DownloaderMixIn):
-    """A mixin that uses httpx to download."""
+class _HTTPXDownloaderBase:
+    """What the sync and async httpx downloaders have in common."""
 
-    def init_downloader(self) -> None:
-        self.__client = httpx.Client(
+    # How often, in nanoseconds, to check for a slow retrieval attack.
+    SPEED_CHECK_INTERVAL_NS = 1_000_000_000
+
+    def _client_options(self) -> Dict[str, Any]:
+        import httpx
+
+        return dict(
             headers={
-                "User-Agent": f"tuf-on-a-plane/{__version__} httpx/{httpx.__version__}"
+                # We write the raw response to disk, so ask the server not to
+                # compress it.
+                "Accept-Encoding": "identity",
+                "User-Agent": f"tuf-on-a-plane/{__version__} httpx/{httpx.__version__}",
             },
             # Opportunistically use HTTP/2, if available.
             http2=True,
@@ -52,14 +74,52 @@ class HTTPXDownloaderMixIn(DownloaderMixIn):
             timeout=2.0,
         )
 
-    def close_downloader(self) -> None:
-        self.__client.close()
+    def _init_temp_dir(self) -> None:
+        # The temporary directory, and a file descriptor for it, which we open
+        # on the first download.
+        self.__temp_dir: Optional[str] = None
+        self.__temp_dir_fd: Optional[int] = None
 
-    def __check_length(self, path: Url, observed: Length, expected: Length) -> None:
+    def _close_temp_dir(self) -> None:
+        if self.__temp_dir_fd is not None:
+            os.close(self.__temp_dir_fd)
+            self.__temp_dir, self.__temp_dir_fd = None, None
+
+    def _mkstemp(self, temp_dir: str) -> Tuple[int, Filepath]:
+        """Create a new temporary file, and return its descriptor and path.
+
+        Unlike tempfile.mkstemp, we neither stat the directory nor retry random
+        names each time: we open the directory once, and use a counter."""
+        if not _HAS_DIR_FD:
+            return tempfile.mkstemp(prefix="dl_", dir=temp_dir)
+
+        if temp_dir != self.__temp_dir:
+            if self.__temp_dir_fd is not None:
+                os.close(self.__temp_dir_fd)
+            self.__temp_dir_fd = os.open(temp_dir, os.O_RDONLY | os.O_DIRECTORY)
+            self.__temp_dir = temp_dir
+
+        name = f"dl_{os.getpid()}_{next(_temp_counter)}"
+        fd = os.open(
+            name,
+            os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+            0o600,
+            dir_fd=self.__temp_dir_fd,
+        )
+        return fd, os.path.join(temp_dir, name)
+
+    def _check_length(self, path: Url, observed: int, expected: int) -> None:
         if observed > expected:
             raise EndlessDataAttack(f"{observed} > {expected} bytes on {path}")
 
-    def __check_not_found(self, path: Url, response: httpx.Response) -> None:
+    def _check_encoding(self, path: Url, response: "httpx.Response") -> None:
+        encoding = response.headers.get("Content-Encoding", "identity")
+        if encoding != "identity":
+            raise DownloadError(f"unexpected Content-Encoding {encoding} on {path}")
+
+    def _check_not_found(self, path: Url, response: "httpx.Response") -> None:
+        import httpx
+
         try:
             response.raise_for_status()
         except httpx.HTTPStatusError as e:
@@ -67,71 +127,203 @@ class HTTPXDownloaderMixIn(DownloaderMixIn):
                 raise DownloadNotFoundError(path) from e
             raise
 
-    def __check_speed(self, path: Url, observed: Speed, expected: Speed) -> None:
-        if observed < expected:
+    def _check_speed(
+        self, path: Url, observed_bytes: int, observed_ns: int, expected: int
+    ) -> None:
+        # NOTE: Compare bytes/sec without dividing, so that we stay in ints.
+        if observed_bytes * 1_000_000_000 < expected * observed_ns:
+            observed = observed_bytes * 1_000_000_000 // observed_ns
             raise SlowRetrievalAttack(f"{observed} < {expected} bytes/sec on {path}")
 
-    def __chunk(
-        self,
-        response: httpx.Response,
-        path: Url,
-        expected_length: Length,
-        prev_downloaded: int,
-        prev_time: DateTime,
-        config: Config,
-        chunk: bytes,
-        written_bytes: int,
-        temp_file: IO,
-    ) -> Tuple[int, DateTime, int]:
-        curr_downloaded, curr_time = (
-            response.num_bytes_downloaded,
-            DateTime.now(),
-        )
-        self.__check_length(path, curr_downloaded, expected_length)
-        downloaded_length = curr_downloaded - prev_downloaded
+    def _check_response(
+        self, path: Url, response: "httpx.Response", expected: int
+    ) -> None:
+        """Check the headers of a response, before we read its body."""
+        self._check_not_found(path, response)
+        self._check_encoding(path, response)
+        alleged_length = int(response.headers.get("Content-Length", expected))
+        self._check_length(path, alleged_length, expected)
+
+    def _write_rest(self, fd: int, chunk: bytes, written: int) -> None:
+        """Finish writing a chunk after a short write."""
+        view = memoryview(chunk)[written:]
+        while view:
+            view = view[os.write(fd, view) :]
+
+
+# NOTE: Repositories are often created anew for every refresh, so all sync
+# downloaders in a process share one client, and so its pool of keep-alive
+# connections, instead of paying for new TCP and TLS handshakes every time.
+_shared_client: Optional["httpx.Client"] = None
+# A forked child must not reuse the connections of its parent.
+_shared_client_pid: Optional[int] = None
+_shared_client_lock = threading.Lock()
+
+
+def _get_shared_client(options: Dict[str, Any]) -> "httpx.Client":
+    global _shared_client, _shared_client_pid
+
+    with _shared_client_lock:
+        if _shared_client is None or _shared_client_pid != os.getpid():
+            import httpx
 
-        if downloaded_length:
-            time_diff = (curr_time - prev_time).total_seconds()
-            chunk_speed = Speed(downloaded_length / time_diff)
-            self.__check_speed(path, chunk_speed, config.SLOW_RETRIEVAL_THRESHOLD)
+            _shared_client = httpx.Client(**options)
+            _shared_client_pid = os.getpid()
+        return _shared_client
 
-        chunk_length = len(chunk)
-        if chunk_length:
-            written_bytes += chunk_length
-            written_length = Length(written_bytes)
-            self.__check_length(path, curr_downloaded, written_length)
-            self.__check_length(path, written_length, expected_length)
-            temp_file.write(chunk)
 
-        return curr_downloaded, DateTime.now(), written_bytes
+@atexit.register
+def _close_shared_client() -> None:
+    global _shared_client
+
+    with _shared_client_lock:
+        if _shared_client is not None and _shared_client_pid == os.getpid():
+            _shared_client.close()
+        _shared_client = None
+
+
+class HTTPXDownloaderMixIn(_HTTPXDownloaderBase, DownloaderMixIn):
+    """A mixin that uses httpx to download."""
+
+    def init_downloader(self) -> None:
+        self.__client = _get_shared_client(self._client_options())
+        self._init_temp_dir()
+
+    def close_downloader(self) -> None:
+        # NOTE: We do not close the shared client, which other downloaders may
+        # be using, and which we close at exit.
+        self._close_temp_dir()
 
     def download(self, path: Url, expected_length: Length, config: Config) -> Filepath:
-        temp_fd, temp_path = tempfile.mkstemp(dir=config.temp_dir)
+        import httpx
+
+        temp_fd, temp_path = self._mkstemp(config.temp_dir)
 
-        with open(temp_fd, "wb") as temp_file:
+        try:
             with self.__client.stream("GET", path) as response:
-                self.__check_not_found(path, response)
-                alleged_length = response.headers.get(
-                    "Content-Length", expected_length.value
-                )
-                self.__check_length(path, alleged_length, expected_length)
-                prev_downloaded, prev_time, written_bytes = 0, DateTime.now(), 0
+                # NOTE: Unwrap these once, so that we compare plain ints per chunk.
+                expected_int = expected_length.value
+                threshold_int = config.SLOW_RETRIEVAL_THRESHOLD.value
+                self._check_response(path, response, expected_int)
+
+                # NOTE: This loop runs once per chunk, so we inline the checks,
+                # keep all state in local variables, and bind functions to local
+                # names. The async download repeats this loop, so keep the two
+                # in step.
+                interval_ns = self.SPEED_CHECK_INTERVAL_NS
+                monotonic_ns, write = time.monotonic_ns, os.write
+                downloaded, prev_ns = 0, monotonic_ns()
+                pending_bytes, pending_ns = 0, 0
 
                 try:
-                    for chunk in response.iter_bytes():
-                        prev_downloaded, prev_time, written_bytes = self.__chunk(
-                            response,
-                            path,
-                            expected_length,
-                            prev_downloaded,
-                            prev_time,
-                            config,
-                            chunk,
-                            written_bytes,
-                            temp_file,
-                        )
+                    # NOTE: Read the raw stream, skipping the content decoder,
+                    # so that each chunk is exactly what the transport gave us.
+                    for chunk in response.iter_raw():
+                        # NOTE: The raw chunks are exactly what was downloaded,
+                        # so we count them ourselves instead of reading the
+                        # response.num_bytes_downloaded property per chunk.
+                        chunk_length = len(chunk)
+                        downloaded += chunk_length
+                        curr_ns = monotonic_ns()
+                        if downloaded > expected_int:
+                            raise EndlessDataAttack(
+                                f"{downloaded} > {expected_int} bytes on {path}"
+                            )
+
+                        # NOTE: Chunks can arrive every few microseconds on a
+                        # fast connection, so we accumulate bytes and time, and
+                        # check the speed only once enough time has passed to
+                        # make a meaningful measurement.
+                        pending_bytes += chunk_length
+                        pending_ns += curr_ns - prev_ns
+                        prev_ns = curr_ns
+                        if pending_ns >= interval_ns:
+                            self._check_speed(
+                                path, pending_bytes, pending_ns, threshold_int
+                            )
+                            pending_bytes, pending_ns = 0, 0
+
+                        # NOTE: Write straight to the file descriptor: chunks
+                        # are already buffered by the transport, so a buffered
+                        # file would only copy them.
+                        if chunk:
+                            written = write(temp_fd, chunk)
+                            if written < chunk_length:
+                                self._write_rest(temp_fd, chunk, written)
 
                 except httpx.TimeoutException as e:
                     raise SlowRetrievalAttack(f"timeout on {path}") from e
 
+        finally:
+            os.close(temp_fd)
+
+        return temp_path
+
+
+class AsyncHTTPXDownloaderMixIn(_HTTPXDownloaderBase):
+    """A mixin that uses an async httpx client to download.
+
+    This is for callers that need to download many files at once: over HTTP/2,
+    concurrent downloads share a single connection."""
+
+    def init_downloader(self) -> None:
+        import httpx
+
+        self.__client = httpx.AsyncClient(**self._client_options())
+        self._init_temp_dir()
+
+    async def close_downloader(self) -> None:
+        await self.__client.aclose()
+        self._close_temp_dir()
+
+    async def download(
+        self, path: Url, expected_length: Length, config: Config
+    ) -> Filepath:
+        import httpx
+
+        temp_fd, temp_path = self._mkstemp(config.temp_dir)
+
+        try:
+            async with self.__client.stream("GET", path) as response:
+                expected_int = expected_length.value
+                threshold_int = config.SLOW_RETRIEVAL_THRESHOLD.value
+                self._check_response(path, response, expected_int)
+
+                # NOTE: This is the same loop as in HTTPXDownloaderMixIn.download,
+                # which explains it.
+                interval_ns = self.SPEED_CHECK_INTERVAL_NS
+                monotonic_ns, write = time.monotonic_ns, os.write
+                downloaded, prev_ns = 0, monotonic_ns()
+                pending_bytes, pending_ns = 0, 0
+
+                try:
+                    async for chunk in response.aiter_raw():
+                        chunk_length = len(chunk)
+                        downloaded += chunk_length
+                        curr_ns = monotonic_ns()
+                        if downloaded > expected_int:
+                            raise EndlessDataAttack(
+                                f"{downloaded} > {expected_int} bytes on {path}"
+                            )
+
+                        pending_bytes += chunk_length
+                        pending_ns += curr_ns - prev_ns
+                        prev_ns = curr_ns
+                        if pending_ns >= interval_ns:
+                            self._check_speed(
+                                path, pending_bytes, pending_ns, threshold_int
+                            )
+                            pending_bytes, pending_ns = 0, 0
+
+                        if chunk:
+                            written = write(temp_fd, chunk)
+                            if written < chunk_length:
+                                self._write_rest(temp_fd, chunk, written)
+
+                except httpx.TimeoutException as e:
+                    raise SlowRetrievalAttack(f"timeout on {path}") from e
+
+        finally:
+            os.close(temp_fd)
+
         return temp_path
@@ -1,5 +1,4 @@
 from datetime import datetime, timedelta, timezone
-from functools import total_ordering
 import re
 from typing import Any, cast, Dict, List, Set
 
@@ -30,78 +29,65 @@ class DateTime(datetime):
         return cast(DateTime, super().strptime(date_string, format))
 
 
-@total_ordering
+# NOTE: We define every comparison instead of using functools.total_ordering,
+# whose derived comparisons go through extra Python-level calls.
 class Comparable:
+    # NOTE: So that dataclasses with slots do not get a __dict__ from us.
+    __slots__ = ()
+
     def __eq__(self, other: Any) -> bool:
         raise NotImplementedError
 
     def __lt__(self, other: Any) -> bool:
         raise NotImplementedError
 
+    def __le__(self, other: Any) -> bool:
+        raise NotImplementedError
 
-class Natural(Comparable):
-    def __init__(self, value: Any):
-        self.value = value
+    def __gt__(self, other: Any) -> bool:
+        raise NotImplementedError
 
-    def __add__(self, other: Any) -> Any:
-        if not isinstance(other, self.__class__):
-            other = self.__class__(other)
-        return self.__class__(self.value + other.value)
+    def __ge__(self, other: Any) -> bool:
+        raise NotImplementedError
 
-    def __eq__(self, other: Any) -> bool:
-        if not isinstance(other, self.__class__):
-            other = self.__class__(other)
-        return self.value == other.value
 
-    def __lt__(self, other: Any) -> bool:
-        if not isinstance(other, self.__class__):
-            other = self.__class__(other)
-        return self.value < other.value
+# NOTE: We subclass int, so that arithmetic and comparisons are done in C.
+# Empty __slots__ mean that instances do not allocate a __dict__, and we skip
+# the round trip through float for values that are already ints, which is what
+# JSON gives us.
+class Natural(int):
+    __slots__ = ()
 
-    def __sub__(self, other: Any) -> Any:
-        if not isinstance(other, self.__class__):
-            other = self.__class__(other)
-        return self.__class__(self.value - other.value)
+    def __new__(cls, value: Any) -> "Natural":
+        if type(value) is not int:
+            value = round(float(value))
+        if value < 0:
+            raise ValueError(f"{value} < 0")
+        return super().__new__(cls, value)
 
     def __repr__(self):
-        return f"{self.__class__.__name__}({self.value})"
+        return f"{self.__class__.__name__}({int(self)})"
 
     def __str__(self):
-        return str(self.value)
+        return int.__repr__(self)
 
     @property
     def value(self) -> int:
-        return self.__value
-
-    @value.setter
-    def value(self, value: Any) -> None:
-        value = round(float(value))
-        if value < 0:
-            raise ValueError(f"{value} < 0")
-        self.__value = value
+        return int(self)
 
 
 Speed = Natural
 
 
 class Positive(Natural):
-    # FIXME: This is actually implicitly defined by @total_ordering, but mypy
-    # does not pick it up: https://github.com/python/mypy/issues/4610
-    def __le__(self, other: Any) -> bool:
-        if not isinstance(other, self.__class__):
-            other = self.__class__(other)
-        return self.value <= other.value
-
-    @property
-    def value(self) -> int:
-        return self.__value
+    __slots__ = ()
 
-    @value.setter
-    def value(self, value: Any) -> None:
-        value = round(float(value))
+    def __new__(cls, value: Any) -> "Positive":
+        if type(value) is not int:
+            value = round(float(value))
         if value <= 0:
             raise ValueError(f"{value} <= 0")
-        self.__value = value
+        return int.__new__(cls, value)
 
 
 Length = Positive
@@ -109,16 +95,21 @@ Threshold = Positive
 
 
 class Version(Positive):
+    __slots__ = ()
+
     def __str__(self):
-        return f"v{self.value}"
+        return f"v{int(self)}"
 
 
 class SpecVersion:
     # https://semver.org/#is-there-a-suggested-regular-expression-regex-to-check-a-semver-string
-    SemVer = r"^(?P<major>0|[1-9]\d*)\.(?P<minor>0|[1-9]\d*)\.(?P<patch>0|[1-9]\d*)(?:-(?P<prerelease>(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)(?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*))?(?:\+(?P<buildmetadata>[0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?$"
+    SemVer = re.compile(
+        r"^(?P<major>0|[1-9]\d*)\.(?P<minor>0|[1-9]\d*)\.(?P<patch>0|[1-9]\d*)(?:-(?P<prerelease>(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)(?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*))?(?:\+(?P<buildmetadata>[0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?$",
+        re.ASCII,
+    )
 
     def __init__(self, value: str) -> None:
-        m = re.match(self.SemVer, value)
+        m = self.SemVer.match(value)
         if m is None:
             raise ValueError(f"{value} is not a SemVer")
         else:
@@ -1,11 +1,26 @@
-from binascii import unhexlify
-from dataclasses import dataclass
-from typing import Any, Dict, Optional, Set
-
-from securesystemslib.ecdsa_keys import verify_signature as verify_ecdsa_signature
-from securesystemslib.ed25519_keys import verify_signature as verify_ed25519_signature
-from securesystemslib.rsa_keys import verify_rsa_signature
+from concurrent.futures import as_completed, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from fnmatch import translate
+import hashlib
+import os
+import re
+import sys
+import threading
+from typing import Any, Callable, cast, Dict, Optional, Pattern, Tuple, Union
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric.ec import (
+    ECDSA,
+    EllipticCurvePublicKey,
+)
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
+from nacl.exceptions import BadSignatureError
+from nacl.signing import VerifyKey
 
+from ..cache import LRUCache
 from .common import (
     Comparable,
     DateTime,
@@ -21,16 +36,20 @@ from .common import (
     Version,
 )
 
+# NOTE: Large metadata can have thousands of TargetFiles and TimeSnaps, so we
+# use slots to save memory, where dataclasses support them (Python >= 3.10).
+SLOTS: Dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-# Each key may list one or more signatures.
-Signature = str
-# NOTE: In Python >= 3.7, KeyIDs are ordered (because dict), but not
-# Signatures (because set).
-Signatures = Dict[KeyID, Set[Signature]]
+# Each key may list exactly one signature.
+# NOTE: The parser decodes signatures from hex, so that we do not have to for
+# every verification.
+Signature = bytes
+# NOTE: In Python >= 3.7, KeyIDs are ordered (because dict).
+Signatures = Dict[KeyID, Signature]
 
 
 # __eq__ and __str__ autogenerated by dataclass.
-@dataclass
+@dataclass(**SLOTS)
 class Signed(Comparable):
     expires: DateTime
     spec_version: SpecVersion
@@ -41,14 +60,23 @@ class Signed(Comparable):
             raise NotImplementedError
         return self.version < other.version
 
-    # NOTE: Overrides __eq__ and __lt__.
     def __gt__(self, other: Any) -> bool:
         if not isinstance(other, Signed):
             raise NotImplementedError
         return self.version > other.version
 
+    def __le__(self, other: Any) -> bool:
+        if not isinstance(other, Signed):
+            raise NotImplementedError
+        return self.version <= other.version
 
-@dataclass
+    def __ge__(self, other: Any) -> bool:
+        if not isinstance(other, Signed):
+            raise NotImplementedError
+        return self.version >= other.version
+
+
+@dataclass(**SLOTS)
 class Metadata:
     # NOTE: I suppose "canonical" should be the result of lazily serializing
     # "signed", but I do not want to repeat the writing work from
@@ -62,92 +90,226 @@ class Metadata:
 # We don't need a separate key type, because the scheme already encodes this
 # information redundantly.
 # TODO: generalize to more signing schemes per public key algorithm.
-@dataclass
+# NOTE: There is exactly one instance per scheme (see below), so that we can
+# compare schemes by identity.
+@dataclass(frozen=True, **SLOTS)
 class Scheme:
     value: str
 
 
-@dataclass
-class ECDSAScheme(Scheme):
-    value: str = "ecdsa-sha2-nistp256"
-
+ECDSA_SCHEME = Scheme("ecdsa-sha2-nistp256")
+ED25519_SCHEME = Scheme("ed25519")
+RSA_SCHEME = Scheme("rsassa-pss-sha256")
 
-@dataclass
-class ED25519Scheme(Scheme):
-    value: str = "ed25519"
 
+PEMKey = Union[EllipticCurvePublicKey, RSAPublicKey]
 
-@dataclass
-class RSAScheme(Scheme):
-    value: str = "rsassa-pss-sha256"
 
-
-@dataclass
+# NOTE: Frozen, so that we can use it as a key in the cache of signatures.
+@dataclass(frozen=True, **SLOTS)
 class PublicKey:
     scheme: Scheme
-    value: str
+    # NOTE: The parser decodes ed25519 keys from hex, so that we do not have to
+    # for every verification. ECDSA and RSA keys are PEM strings.
+    value: Union[bytes, str]
+    # NOTE: The parser also loads ECDSA and RSA keys with cryptography, so that
+    # we do not have to decode the PEM for every verification.
+    pem_key: Optional[PEMKey] = field(default=None, compare=False, repr=False)
 
     def __eq__(self, other: Any) -> bool:
         if not isinstance(other, PublicKey):
             return False
         return self.scheme is other.scheme and self.value == other.value
 
-    def signed(self, sig: Signature, data: bytes) -> bool:
-        # FIXME: The securesystemslib "abstraction" feels ad hoc...
-        public = self.value
-        scheme = self.scheme
-        sig_bytes = unhexlify(sig.encode("utf-8"))
+    def signed(
+        self, sig: Signature, data: bytes, digest: Optional[bytes] = None
+    ) -> bool:
+        """Return whether this key signed data.
+
+        digest is the SHA-256 digest of data, if the caller already has it."""
+        try:
+            verify = VERIFIERS[self.scheme]
+        except KeyError:
+            raise ValueError(f"unknown scheme: {self.scheme}") from None
+        if digest is None:
+            digest = hashlib.sha256(data).digest()
+        return verify(self, sig, data, digest)
+
+
+def get_pem_key(pubkey: PublicKey) -> PEMKey:
+    pem_key = pubkey.pem_key
+    if pem_key is None:
+        raise ValueError(f"{pubkey} has no PEM key loaded")
+    return pem_key
+
+
+# NOTE: Both ECDSA and RSA sign SHA-256 digests, so we reuse the digest that we
+# computed once for all keys, instead of hashing the data again per key.
+_PREHASHED_SHA256 = Prehashed(hashes.SHA256())
+_ECDSA_PREHASHED_SHA256 = ECDSA(_PREHASHED_SHA256)
+# NOTE: Like securesystemslib, we use a salt as long as the digest.
+_RSA_PSS_PADDING = padding.PSS(
+    mgf=padding.MGF1(hashes.SHA256()), salt_length=hashes.SHA256.digest_size
+)
+
+
+def verify_ecdsa(pubkey: PublicKey, sig: Signature, data: bytes, digest: bytes) -> bool:
+    ecdsa_key = cast(EllipticCurvePublicKey, get_pem_key(pubkey))
+    try:
+        ecdsa_key.verify(sig, digest, _ECDSA_PREHASHED_SHA256)
+    except InvalidSignature:
+        return False
+    return True
+
+
+def verify_ed25519(
+    pubkey: PublicKey, sig: Signature, data: bytes, digest: bytes
+) -> bool:
+    # NOTE: Call libsodium directly: securesystemslib would only validate the
+    # schemas of its arguments before doing the same. Ed25519 hashes the data
+    # itself, so we cannot use the digest.
+    try:
+        VerifyKey(cast(bytes, pubkey.value)).verify(data, sig)
+    except BadSignatureError:
+        return False
+    return True
+
 
-        if scheme is ECDSAScheme:
-            return verify_ecdsa_signature(public, scheme.value, sig_bytes, data)
-        elif scheme is ED25519Scheme:
-            public_bytes = unhexlify(public.encode("utf-8"))
-            return verify_ed25519_signature(public_bytes, scheme.value, sig_bytes, data)
-        elif scheme is RSAScheme:
-            return verify_rsa_signature(sig_bytes, scheme.value, public, data)
-        else:
-            raise ValueError(f"unknown scheme: {scheme}")
+def verify_rsa(pubkey: PublicKey, sig: Signature, data: bytes, digest: bytes) -> bool:
+    rsa_key = cast(RSAPublicKey, get_pem_key(pubkey))
+    try:
+        rsa_key.verify(sig, digest, _RSA_PSS_PADDING, _PREHASHED_SHA256)
+    except InvalidSignature:
+        return False
+    return True
+
+
+VERIFIERS: Dict[Scheme, Callable[[PublicKey, Signature, bytes, bytes], bool]] = {
+    ECDSA_SCHEME: verify_ecdsa,
+    ED25519_SCHEME: verify_ed25519,
+    RSA_SCHEME: verify_rsa,
+}
 
 
 PublicKeys = Dict[KeyID, PublicKey]
 
 
+# NOTE: We verify the same signatures on the same metadata again whenever we
+# reload it (e.g., the trusted root, or when we refresh), so we remember
+# whether a key signed some data. This is keyed on the key itself, and not on
+# its keyid, so the cache never decides which keys are trusted, and we need
+# not clear it when the root rotates keys. We key on a digest of the data, so
+# that we neither keep nor compare what could be large metadata.
+# NOTE: We may verify signatures in parallel (see below), and LRUCache is
+# thread-safe.
+_signed_cache: LRUCache[Tuple[PublicKey, Signature, bytes], bool] = LRUCache(1024)
+
+
+def _signed(pubkey: PublicKey, sig: Signature, data: bytes, digest: bytes) -> bool:
+    key = (pubkey, sig, digest)
+    result = _signed_cache.get(key)
+    if result is None:
+        result = pubkey.signed(sig, data, digest)
+        _signed_cache.put(key, result)
+    return result
+
+
+# NOTE: libsodium and OpenSSL release the GIL while they verify, so we verify
+# signatures by different keys in parallel, but only when there are enough
+# keys to make up for the overhead of threads.
+PARALLEL_VERIFICATION_MIN_KEYS = 4
+_executor: Optional[ThreadPoolExecutor] = None
+# A forked child does not inherit the worker threads of its parent.
+_executor_pid: Optional[int] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=os.cpu_count(), thread_name_prefix="tuf-on-a-plane"
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
 # NOTE: maybe this can be a Role instead, but I will leave this design
 # decision to the future, especially when we write the code for delegations.
 class ThresholdOfPublicKeys:
+    __slots__ = ("threshold", "pubkeys", "fingerprint")
+
     def __init__(self, threshold: Threshold, pubkeys: PublicKeys):
         if len(pubkeys) < threshold.value:
             raise ValueError(f"{len(pubkeys)} < {threshold.value}")
         self.threshold = threshold
         self.pubkeys = pubkeys
+        self.fingerprint = self.__fingerprint(pubkeys)
+
+    @staticmethod
+    def __fingerprint(pubkeys: PublicKeys) -> bytes:
+        """Return a digest of the keys, so that we can compare them at once."""
+        h = hashlib.sha256()
+        for keyid in sorted(pubkeys):
+            pubkey = pubkeys[keyid]
+            # NOTE: repr() delimits and distinguishes bytes from str for us.
+            h.update(repr((keyid, pubkey.scheme.value, pubkey.value)).encode("utf-8"))
+        return h.digest()
 
     def __eq__(self, other: Any) -> bool:
         if not isinstance(other, ThresholdOfPublicKeys):
             return False
-        if self.threshold != other.threshold:
-            return False
-        if self.pubkeys.keys() != other.pubkeys.keys():
-            return False
-        for keyid in self.pubkeys:
-            if self.pubkeys[keyid] != other.pubkeys[keyid]:
-                return False
-        return True
+        return (
+            self.threshold == other.threshold and self.fingerprint == other.fingerprint
+        )
 
     def verified(self, signatures: Signatures, data: bytes) -> bool:
-        counter = 0
+        digest = hashlib.sha256(data).digest()
 
+        if len(self.pubkeys) >= PARALLEL_VERIFICATION_MIN_KEYS:
+            return self.__verified_in_parallel(signatures, data, digest)
+
+        counter, threshold = 0, self.threshold.value
         # NOTE: each keyid is counted at most once.
         for keyid, pubkey in self.pubkeys.items():
-            sigs = signatures.get(keyid, set())
-            for sig in sigs:
-                if pubkey.signed(sig, data):
+            sig = signatures.get(keyid)
+            if sig is not None and _signed(pubkey, sig, data, digest):
+                counter += 1
+                # NOTE: Stop verifying as soon as we have enough signatures.
+                if counter >= threshold:
+                    return True
+
+        return False
+
+    def __verified_in_parallel(
+        self, signatures: Signatures, data: bytes, digest: bytes
+    ) -> bool:
+        counter, threshold = 0, self.threshold.value
+        executor = _get_executor()
+
+        # NOTE: each keyid is counted at most once.
+        futures = [
+            executor.submit(_signed, pubkey, signatures[keyid], data, digest)
+            for keyid, pubkey in self.pubkeys.items()
+            if keyid in signatures
+        ]
+        try:
+            for future in as_completed(futures):
+                if future.result():
                     counter += 1
-                    break
+                    if counter >= threshold:
+                        return True
+        finally:
+            # NOTE: Do not verify what we no longer need to.
+            for future in futures:
+                future.cancel()
 
-        return counter >= self.threshold.value
+        return False
 
 
-@dataclass
+@dataclass(**SLOTS)
 class Root(Signed):
     consistent_snapshot: bool
     root: ThresholdOfPublicKeys
@@ -157,7 +319,7 @@ class Root(Signed):
 
 
 # __eq__ and __str__ autogenerated by dataclass.
-@dataclass
+@dataclass(**SLOTS)
 class TimeSnap(Comparable):
     version: Version
     hashes: Optional[Hashes] = None
@@ -168,27 +330,36 @@ class TimeSnap(Comparable):
             raise NotImplementedError
         return self.version < other.version
 
-    # NOTE: Overrides __eq__ and __lt__.
     def __gt__(self, other: Any) -> bool:
         if not isinstance(other, TimeSnap):
             raise NotImplementedError
         return self.version > other.version
 
+    def __le__(self, other: Any) -> bool:
+        if not isinstance(other, TimeSnap):
+            raise NotImplementedError
+        return self.version <= other.version
+
+    def __ge__(self, other: Any) -> bool:
+        if not isinstance(other, TimeSnap):
+            raise NotImplementedError
+        return self.version >= other.version
+
 
 TimeSnaps = Dict[Filepath, TimeSnap]
 
 
-@dataclass
+@dataclass(**SLOTS)
 class Timestamp(Signed):
     snapshot: TimeSnap
 
 
-@dataclass
+@dataclass(**SLOTS)
 class Snapshot(Signed):
     targets: TimeSnaps
 
 
-@dataclass
+@dataclass(**SLOTS)
 class TargetFile:
     hashes: Hashes
     length: Length
@@ -198,18 +369,32 @@ class TargetFile:
 TargetFiles = Dict[Filepath, TargetFile]
 
 
-@dataclass
+@dataclass(**SLOTS)
 class Delegation:
     role: ThresholdOfPublicKeys
     # TODO: path_hash_prefixes
     paths: Filepaths
     terminating: bool = False
+    # NOTE: All paths compiled into one regex, so that we can match a target
+    # against all of them at once, instead of calling fnmatch for each.
+    pattern: Pattern = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # NOTE: An empty regex would match everything, whereas no paths should
+        # match nothing.
+        pattern = "|".join(translate(os.path.normcase(path)) for path in self.paths)
+        self.pattern = re.compile(pattern or "(?!)")
+
+    def matches(self, target_relpath: Filepath) -> bool:
+        """Return whether fnmatch would match target_relpath against any of our
+        paths."""
+        return self.pattern.match(os.path.normcase(target_relpath)) is not None
 
 
 Delegations = Dict[Rolename, Delegation]
 
 
-@dataclass
+@dataclass(**SLOTS)
 class Targets(Signed):
     targets: TargetFiles
     delegations: Delegations
@@ -1,19 +1,37 @@
 """A recursive descent parser for JSON TUF metadata."""
 
+from datetime import timezone
+from functools import lru_cache
+import hashlib
 import os
 import re
 from typing import (
     Any,
     Callable,
+    cast,
+    Dict,
+    FrozenSet,
     List,
-    Sized,
     Tuple,
-    Type,
+    Union,
 )
 
-from securesystemslib.formats import encode_canonical
+from cryptography.hazmat.primitives.asymmetric.ec import (
+    EllipticCurvePublicKey,
+    SECP256R1,
+)
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+from cryptography.hazmat.primitives.serialization import load_pem_public_key
+
+# NOTE: orjson is optional, but parses much faster than the standard library.
+# Both preserve the order of keys, which we need.
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads  # type: ignore
 
 from . import Parser
+from ..cache import LRUCache
 from ..models.common import (
     DateTime,
     Filepaths,
@@ -28,13 +46,14 @@ from ..models.common import (
 from ..models.metadata import (
     Delegation,
     Delegations,
-    ECDSAScheme,
-    ED25519Scheme,
+    ECDSA_SCHEME,
+    ED25519_SCHEME,
     Metadata,
+    PEMKey,
     PublicKey,
     PublicKeys,
     Root,
-    RSAScheme,
+    RSA_SCHEME,
     Scheme,
     Signature,
     Signatures,
@@ -56,44 +75,93 @@ def check_dict(d: Any) -> None:
         raise TypeError(f"{d} is not a dict")
 
 
-def canonical(_signed: Json) -> bytes:
-    """Returns the UTF-8 encoded canonical JSON representation of _signed."""
-    return encode_canonical(_signed).encode("utf-8")
+class _Literal:
+    """Output that the canonical encoder writes as is."""
 
+    __slots__ = ("text",)
 
-def check_key(observed: str, expected: str) -> None:
-    if observed != expected:
-        raise ValueError(f"{observed} != {expected}")
+    def __init__(self, text: str):
+        self.text = text
 
 
-def spec_version(sv: str) -> SpecVersion:
-    _spec_version = SpecVersion(sv)
-    if _spec_version.major != 1:
-        raise ValueError(f"unsupported major spec_version: {_spec_version}")
-    return _spec_version
+_BEGIN_LIST, _END_LIST = _Literal("["), _Literal("]")
+_BEGIN_DICT, _END_DICT = _Literal("{"), _Literal("}")
+_COMMA = _Literal(",")
+# NOTE: Canonical JSON escapes only quotes and backslashes.
+_ESCAPES = str.maketrans({'"': '\\"', "\\": "\\\\"})
 
 
-def footer(
-    _signed: Json, callback: Callable[[Json], Any] = lambda x: None
-) -> Tuple[SpecVersion, Any, Version]:
-    check_dict(_signed)
+def canonical(_signed: Json) -> bytes:
+    """Returns the UTF-8 encoded canonical JSON representation of _signed.
+
+    This is the same as securesystemslib.formats.encode_canonical, but we walk
+    the object with an explicit stack instead of recursing on every value."""
+    output: List[str] = []
+    write = output.append
+    stack: List[Any] = [_signed]
+    pop, push = stack.pop, stack.append
+
+    while stack:
+        obj = pop()
+        if type(obj) is _Literal:
+            write(obj.text)
+        elif isinstance(obj, str):
+            write(f'"{obj.translate(_ESCAPES)}"')
+        elif obj is True:
+            write("true")
+        elif obj is False:
+            write("false")
+        elif obj is None:
+            write("null")
+        elif isinstance(obj, int):
+            write(str(obj))
+        elif isinstance(obj, (list, tuple)):
+            # NOTE: Push in reverse, so that we pop in order.
+            push(_END_LIST)
+            for i in range(len(obj) - 1, -1, -1):
+                push(obj[i])
+                if i > 0:
+                    push(_COMMA)
+            push(_BEGIN_LIST)
+        elif isinstance(obj, dict):
+            push(_END_DICT)
+            items = sorted(obj.items())
+            for i in range(len(items) - 1, -1, -1):
+                k, v = items[i]
+                check_str(k)
+                push(v)
+                push(_Literal(f'"{k.translate(_ESCAPES)}":'))
+                if i > 0:
+                    push(_COMMA)
+            push(_BEGIN_DICT)
+        else:
+            raise TypeError(f"cannot canonicalize {obj!r}")
+
+    return "".join(output).encode("utf-8")
 
-    k, version = _signed.popitem()
-    check_key(k, "version")
-    version = Version(version)
 
-    result = callback(_signed)
+_NO_KEYS: FrozenSet[str] = frozenset()
 
-    k, _spec_version = _signed.popitem()
-    check_key(k, "spec_version")
-    _spec_version = spec_version(_spec_version)
 
-    return _spec_version, result, version
+def check_keys(
+    d: Any, expected: FrozenSet[str], optional: FrozenSet[str] = _NO_KEYS
+) -> None:
+    """Check that d is a dict with exactly the expected keys, plus any of the
+    optional keys, so that we can then read them directly, in one pass, instead
+    of popping them in order."""
+    check_dict(d)
+    _keys = d.keys()
+    if _keys != expected and (
+        not optional or not expected <= _keys <= expected | optional
+    ):
+        raise ValueError(f"{d} has keys {sorted(d)} != {sorted(expected)}")
 
 
-def check_empty(i: Sized) -> None:
-    if len(i) > 0:
-        raise ValueError(f"{i} is not empty")
+def spec_version(sv: str) -> SpecVersion:
+    _spec_version = SpecVersion(sv)
+    if _spec_version.major != 1:
+        raise ValueError(f"unsupported major spec_version: {_spec_version}")
+    return _spec_version
 
 
 def check_str(s: Any) -> None:
@@ -101,60 +169,90 @@ def check_str(s: Any) -> None:
         raise TypeError(f"{s} is not a str")
 
 
-def keyval(_keyval: Json) -> str:
-    check_dict(_keyval)
+_KEYVAL_KEYS = frozenset({"public"})
 
-    k, public = _keyval.popitem()
-    check_key(k, "public")
+
+def keyval(_keyval: Json, scheme: Scheme) -> Union[bytes, str]:
+    check_keys(_keyval, _KEYVAL_KEYS)
+
+    public = _keyval["public"]
     check_str(public)
 
-    check_empty(_keyval)
+    # NOTE: ed25519 keys are hex, whereas ECDSA and RSA keys are PEM.
+    if scheme is ED25519_SCHEME:
+        return bytes.fromhex(public)
     return public
 
 
-def check_scheme(observed: Type[Scheme], expected: Type[Scheme]) -> None:
+def pem_key(public: str, scheme: Scheme) -> PEMKey:
+    _pem_key = load_pem_public_key(public.encode("utf-8"))
+    if scheme is ECDSA_SCHEME:
+        if not isinstance(_pem_key, EllipticCurvePublicKey) or not isinstance(
+            _pem_key.curve, SECP256R1
+        ):
+            raise ValueError(f"{public} is not an ECDSA P-256 public key")
+    elif scheme is RSA_SCHEME:
+        if not isinstance(_pem_key, RSAPublicKey):
+            raise ValueError(f"{public} is not an RSA public key")
+    else:
+        raise ValueError(f"{scheme} does not use PEM keys")
+    return _pem_key
+
+
+_SCHEMES = {
+    scheme.value: scheme for scheme in (ECDSA_SCHEME, ED25519_SCHEME, RSA_SCHEME)
+}
+_KEYTYPES = {
+    "ecdsa-sha2-nistp256": ECDSA_SCHEME,
+    "ed25519": ED25519_SCHEME,
+    "rsa": RSA_SCHEME,
+}
+
+
+def check_scheme(observed: Scheme, expected: Scheme) -> None:
     if observed is not expected:
         raise ValueError(f"{observed} != {expected}")
 
 
+# NOTE: The same keys appear in metadata again and again (e.g., in every root,
+# and on every refresh), so we reuse the PublicKey we built for the same key
+# material, which also saves loading PEM keys again. PublicKeys are frozen, so
+# it is safe to share them.
+@lru_cache(maxsize=1024)
+def interned_key(scheme: Scheme, value: Union[bytes, str]) -> PublicKey:
+    if scheme is ED25519_SCHEME:
+        return PublicKey(scheme, value)
+    return PublicKey(scheme, value, pem_key(cast(str, value), scheme))
+
+
+_KEY_KEYS = frozenset({"keyid_hash_algorithms", "keytype", "keyval", "scheme"})
+
+
 def key(_key: Json) -> PublicKey:
-    check_dict(_key)
-
-    k, scheme = _key.popitem()
-    check_key(k, "scheme")
-    if scheme == "ecdsa-sha2-nistp256":
-        scheme = ECDSAScheme
-    elif scheme == "ed25519":
-        scheme = ED25519Scheme
-    elif scheme == "rsassa-pss-sha256":
-        scheme = RSAScheme
-    else:
-        raise ValueError(f"{_key} has unknown scheme: {scheme}")
-
-    k, _keyval = _key.popitem()
-    check_key(k, "keyval")
-    value = keyval(_keyval)
-
-    k, keytype = _key.popitem()
-    check_key(k, "keytype")
-    if keytype == "ecdsa-sha2-nistp256":
-        check_scheme(scheme, ECDSAScheme)
-    elif keytype == "ed25519":
-        check_scheme(scheme, ED25519Scheme)
-    elif keytype == "rsa":
-        check_scheme(scheme, RSAScheme)
-    else:
-        raise ValueError(f"{_key} has unknown keytype: {keytype}")
+    check_keys(_key, _KEY_KEYS)
+
+    # NOTE: We return the shared Scheme instances, so that they compare by
+    # identity.
+    try:
+        scheme = _SCHEMES[_key["scheme"]]
+    except (KeyError, TypeError):
+        raise ValueError(f"{_key} has unknown scheme: {_key['scheme']}") from None
+
+    value = keyval(_key["keyval"], scheme)
+
+    try:
+        keytype = _KEYTYPES[_key["keytype"]]
+    except (KeyError, TypeError):
+        raise ValueError(f"{_key} has unknown keytype: {_key['keytype']}") from None
+    check_scheme(scheme, keytype)
 
-    k, keyid_hash_algorithms = _key.popitem()
-    check_key(k, "keyid_hash_algorithms")
+    keyid_hash_algorithms = _key["keyid_hash_algorithms"]
     if keyid_hash_algorithms != ["sha256", "sha512"]:
         raise ValueError(
             f"{_key} has unknown keyid_hash_algorithms: {keyid_hash_algorithms}"
         )
 
-    check_empty(_key)
-    return PublicKey(scheme, value)
+    return interned_key(scheme, value)
 
 
 def keys(_keys: Json) -> PublicKeys:
@@ -174,25 +272,28 @@ def check_list(_list: Any) -> None:
         raise TypeError(f"{_list} is not a list")
 
 
+_ROLE_KEYS = frozenset({"keyids", "threshold"})
+
+
 def role(
-    _role: dict, _keys: PublicKeys, callback: Callable[[Json], Any] = lambda x: None
-) -> Tuple[Any, ThresholdOfPublicKeys]:
-    check_dict(_role)
+    _role: dict, _keys: PublicKeys, expected_keys: FrozenSet[str] = _ROLE_KEYS
+) -> ThresholdOfPublicKeys:
+    check_keys(_role, expected_keys)
 
-    k, threshold = _role.popitem()
-    check_key(k, "threshold")
+    threshold = _role["threshold"]
     check_int(threshold)
     threshold = Threshold(threshold)
 
-    result = callback(_role)
-
-    k, keyids = _role.popitem()
-    check_key(k, "keyids")
+    keyids = _role["keyids"]
     check_list(keyids)
-    _keys = {keyid: _keys[keyid] for keyid in set(keyids)}
+    # NOTE: dict.fromkeys drops duplicate keyids like a set would, but keeps
+    # their order of appearance.
+    _keys = {keyid: _keys[keyid] for keyid in dict.fromkeys(keyids)}
 
-    check_empty(_role)
-    return result, ThresholdOfPublicKeys(threshold, _keys)
+    return ThresholdOfPublicKeys(threshold, _keys)
+
+
+_ROOT_ROLES_KEYS = frozenset({"root", "snapshot", "targets", "timestamp"})
 
 
 def root_roles(
@@ -203,77 +304,70 @@ def root_roles(
     ThresholdOfPublicKeys,
     ThresholdOfPublicKeys,
 ]:
-    check_dict(roles)
-
-    k, timestamp = roles.popitem()
-    check_key(k, "timestamp")
-    _, timestamp = role(timestamp, _keys)
+    check_keys(roles, _ROOT_ROLES_KEYS)
 
-    k, targets = roles.popitem()
-    check_key(k, "targets")
-    _, targets = role(targets, _keys)
-
-    k, snapshot = roles.popitem()
-    check_key(k, "snapshot")
-    _, snapshot = role(snapshot, _keys)
-
-    k, root = roles.popitem()
-    check_key(k, "root")
-    _, root = role(root, _keys)
+    root = role(roles["root"], _keys)
+    snapshot = role(roles["snapshot"], _keys)
+    targets = role(roles["targets"], _keys)
+    timestamp = role(roles["timestamp"], _keys)
 
     return root, snapshot, targets, timestamp
 
 
-def expires(_expires: str) -> DateTime:
-    return DateTime.strptime(_expires, "%Y-%m-%dT%H:%M:%S%z")
+# YYYY-MM-DDTHH:MM:SSZ, and nothing else that fromisoformat would accept.
+EXPIRES_PATTERN = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}Z")
 
 
-def header(
-    _signed: Json, expected_type: str, callback: Callable[[Json], Any] = lambda x: None
-) -> Tuple[Any, DateTime]:
-    k, _expires = _signed.popitem()
-    check_key(k, "expires")
-    _expires = expires(_expires)
+def expires(_expires: str) -> DateTime:
+    # NOTE: Once the pattern pins the layout, fromisoformat parses it much
+    # faster than strptime, and still rejects out-of-range fields.
+    check_str(_expires)
+    if not EXPIRES_PATTERN.fullmatch(_expires):
+        raise ValueError(f"{_expires} is not in YYYY-MM-DDTHH:MM:SSZ format")
+    _datetime = DateTime.fromisoformat(_expires[:19])
+    return _datetime.replace(tzinfo=timezone.utc)
 
-    result = callback(_signed)
 
-    k, _type = _signed.popitem()
-    check_key(k, "_type")
+def check_type(_signed: Json, expected_type: str) -> None:
+    _type = _signed["_type"]
     if _type != expected_type:
         raise ValueError(f"{_signed} has unexpected type {_type} != {expected_type}")
 
-    check_empty(_signed)
-
-    return result, _expires
-
 
 def check_bool(b: Any) -> None:
     if not isinstance(b, bool):
         raise TypeError(f"{b} is not a bool")
 
 
-def root(_signed: Json) -> Root:
-    _spec_version, _, version = footer(_signed)
+_ROOT_KEYS = frozenset(
+    {
+        "_type",
+        "consistent_snapshot",
+        "expires",
+        "keys",
+        "roles",
+        "spec_version",
+        "version",
+    }
+)
+
 
-    k, _root_roles = _signed.popitem()
-    check_key(k, "roles")
+def root(_signed: Json) -> Root:
+    check_keys(_signed, _ROOT_KEYS)
 
-    k, _keys = _signed.popitem()
-    check_key(k, "keys")
-    _keys = keys(_keys)
+    version = Version(_signed["version"])
+    _spec_version = spec_version(_signed["spec_version"])
+    _keys = keys(_signed["keys"])
 
     # TODO: is it a big deal that we do not check whether all keys listed are used?
-    _root, _snapshot, _targets, _timestamp = root_roles(_root_roles, _keys)
+    _root, _snapshot, _targets, _timestamp = root_roles(_signed["roles"], _keys)
 
-    def callback(_signed: Json) -> bool:
-        k, consistent_snapshot = _signed.popitem()
-        check_key(k, "consistent_snapshot")
-        check_bool(consistent_snapshot)
-        return consistent_snapshot
+    consistent_snapshot = _signed["consistent_snapshot"]
+    check_bool(consistent_snapshot)
 
-    consistent_snapshot, _expires = header(_signed, "root", callback=callback)
+    _expires = expires(_signed["expires"])
+    check_type(_signed, "root")
 
-    check_empty(_signed)
     return Root(
         _expires,
         _spec_version,
@@ -299,80 +393,84 @@ def hashes(_hashes: Json) -> Hashes:
     check_dict(_hashes)
 
     # We don't do much here... for now.
+    # NOTE: There is one of these per target file, so we inline check_str.
     for key, value in _hashes.items():
-        check_str(key)
-        check_str(value)
+        if not isinstance(key, str) or not isinstance(value, str):
+            raise TypeError(f"{_hashes} has a {key}: {value} that is not a str")
 
     return _hashes
 
 
-def meta(_meta: Json) -> TimeSnaps:
-    check_dict(_meta)
-    timesnaps: TimeSnaps = {}
+_TIMESNAP_KEYS = frozenset({"version"})
+_TIMESNAP_OPTIONAL_KEYS = frozenset({"hashes", "length"})
 
-    # NOTE: we iterate in order of appearance to preserve it in the new dict.
-    for filename, timesnap in _meta.items():
-        rolename, _ = os.path.splitext(filename)
-        check_rolename(rolename)
 
-        check_dict(timesnap)
-        k, version = timesnap.popitem()
-        check_key(k, "version")
-        version = Version(version)
+def timesnap(_timesnap: Json) -> TimeSnap:
+    check_keys(_timesnap, _TIMESNAP_KEYS, _TIMESNAP_OPTIONAL_KEYS)
 
-        try:
-            k, length = timesnap.popitem()
-        except KeyError:
-            length = None
-        else:
-            check_key(k, "length")
-            length = Length(length)
+    version = Version(_timesnap["version"])
 
-        try:
-            k, _hashes = timesnap.popitem()
-        except KeyError:
-            _hashes = None
-        else:
-            check_key(k, "hashes")
-            _hashes = hashes(_hashes)
-            check_empty(timesnap)
+    length = _timesnap.get("length")
+    if length is not None:
+        length = Length(length)
+
+    _hashes = _timesnap.get("hashes")
+    if _hashes is not None:
+        _hashes = hashes(_hashes)
+
+    return TimeSnap(version, _hashes, length)
+
+
+def meta_filename(filename: str) -> str:
+    rolename, _ = os.path.splitext(filename)
+    check_rolename(rolename)
+    return filename
 
-        timesnaps[filename] = TimeSnap(version, _hashes, length)
 
-    return timesnaps
+def meta(_meta: Json) -> TimeSnaps:
+    check_dict(_meta)
+
+    # NOTE: we iterate in order of appearance to preserve it in the new dict.
+    return {
+        meta_filename(filename): timesnap(_timesnap)
+        for filename, _timesnap in _meta.items()
+    }
+
+
+_TIMESTAMP_META_KEYS = frozenset({"snapshot.json"})
+_SIGNED_KEYS = frozenset({"_type", "expires", "meta", "spec_version", "version"})
 
 
 def timestamp(_signed: Json) -> Timestamp:
-    _spec_version, _, version = footer(_signed)
+    check_keys(_signed, _SIGNED_KEYS)
 
-    k, _meta = _signed.popitem()
-    check_key(k, "meta")
-    timesnaps = meta(_meta)
-    check_dict(timesnaps)
+    version = Version(_signed["version"])
+    _spec_version = spec_version(_signed["spec_version"])
 
-    k, timesnap = timesnaps.popitem()
-    check_key(k, "snapshot.json")
-    check_empty(timesnaps)
+    _meta = _signed["meta"]
+    check_keys(_meta, _TIMESTAMP_META_KEYS)
+    timesnaps = meta(_meta)
 
-    _, _expires = header(_signed, "timestamp")
+    _expires = expires(_signed["expires"])
+    check_type(_signed, "timestamp")
 
     return Timestamp(
         _expires,
         _spec_version,
         version,
-        timesnap,
+        timesnaps["snapshot.json"],
     )
 
 
 def snapshot(_signed: Json) -> Snapshot:
-    _spec_version, _, version = footer(_signed)
+    check_keys(_signed, _SIGNED_KEYS)
 
-    k, _meta = _signed.popitem()
-    check_key(k, "meta")
-    timesnaps = meta(_meta)
-    check_dict(timesnaps)
+    version = Version(_signed["version"])
+    _spec_version = spec_version(_signed["spec_version"])
+    timesnaps = meta(_signed["meta"])
 
-    _, _expires = header(_signed, "snapshot")
+    _expires = expires(_signed["expires"])
+    check_type(_signed, "snapshot")
 
     return Snapshot(
         _expires,
@@ -382,24 +480,19 @@ def snapshot(_signed: Json) -> Snapshot:
     )
 
 
-def target_file(_target_file: Json) -> TargetFile:
-    check_dict(_target_file)
+_TARGET_FILE_KEYS = frozenset({"hashes", "length"})
+_TARGET_FILE_OPTIONAL_KEYS = frozenset({"custom"})
 
-    k, length = _target_file.popitem()
-    check_key(k, "length")
-    length = Length(length)
 
-    k, _hashes = _target_file.popitem()
-    check_key(k, "hashes")
-    _hashes = hashes(_hashes)
+def target_file(_target_file: Json) -> TargetFile:
+    check_keys(_target_file, _TARGET_FILE_KEYS, _TARGET_FILE_OPTIONAL_KEYS)
 
-    try:
-        k, custom = _target_file.popitem()
-    except KeyError:
-        custom = None
-    else:
+    length = Length(_target_file["length"])
+    _hashes = hashes(_target_file["hashes"])
+
+    custom = _target_file.get("custom")
+    if custom is not None:
         check_dict(custom)
-        check_empty(_target_file)
 
     return TargetFile(_hashes, length, custom)
 
@@ -419,143 +512,165 @@ TARGETS_PATH_PATTERN = re.compile(
 )
 
 
-def targets_roles(roles: dict, _keys: PublicKeys) -> Delegations:
+_TARGETS_ROLE_KEYS = _ROLE_KEYS | {"name", "paths", "terminating"}
+
+
+def targets_roles(roles: List, _keys: PublicKeys) -> Delegations:
     check_list(roles)
     delegations: Delegations = {}
 
-    def callback(_role: dict) -> Tuple[Rolename, Filepaths, bool]:
-        k, terminating = _role.popitem()
-        check_key(k, "terminating")
+    # NOTE: we iterate in order of appearance to preserve it in the new dict.
+    for _role in roles:
+        threshold = role(_role, _keys, expected_keys=_TARGETS_ROLE_KEYS)
+
+        terminating: bool = _role["terminating"]
         check_bool(terminating)
 
-        k, paths = _role.popitem()
-        check_key(k, "paths")
+        paths: Filepaths = _role["paths"]
         check_list(paths)
         for path in paths:
             if not TARGETS_PATH_PATTERN.fullmatch(path):
                 raise ValueError(f"{path} is not a valid targets path pattern")
 
-        k, rolename = _role.popitem()
-        check_key(k, "name")
+        rolename: Rolename = _role["name"]
         check_rolename(rolename)
 
-        return rolename, paths, terminating
-
-    # NOTE: we iterate in order of appearance to preserve it in the new dict.
-    while len(roles) > 0:
-        _role = roles.pop(0)
-
-        rolename: Rolename
-        paths: Filepaths
-        terminating: bool
-        result, _role = role(_role, _keys, callback=callback)
-        rolename, paths, terminating = result
         if rolename in delegations:
             raise ValueError(f"{roles} has duplicate {rolename}")
 
-        delegations[rolename] = Delegation(_role, paths, terminating)
+        delegations[rolename] = Delegation(threshold, paths, terminating)
 
     return delegations
 
 
-def targets(_signed: Json) -> Targets:
-    def get_target_files(_signed: Json) -> TargetFiles:
-        k, _target_files = _signed.popitem()
-        check_key(k, "targets")
-        return target_files(_target_files)
+_DELEGATIONS_KEYS = frozenset({"keys", "roles"})
 
-    _spec_version, _target_files, version = footer(_signed, callback=get_target_files)
 
-    def get_delegations(_signed: Json) -> Delegations:
-        k, delegations = _signed.popitem()
-        check_key(k, "delegations")
-        check_dict(delegations)
+def delegations(_delegations: Json) -> Delegations:
+    check_keys(_delegations, _DELEGATIONS_KEYS)
 
-        k, _targets_roles = delegations.popitem()
-        check_key(k, "roles")
+    _keys = keys(_delegations["keys"])
+    return targets_roles(_delegations["roles"], _keys)
 
-        k, _keys = delegations.popitem()
-        check_key(k, "keys")
-        _keys = keys(_keys)
 
-        check_empty(delegations)
-        return targets_roles(_targets_roles, _keys)
+_TARGETS_KEYS = frozenset(
+    {"_type", "delegations", "expires", "spec_version", "targets", "version"}
+)
+
+
+def targets(_signed: Json) -> Targets:
+    check_keys(_signed, _TARGETS_KEYS)
+
+    version = Version(_signed["version"])
+    _spec_version = spec_version(_signed["spec_version"])
+    _target_files = target_files(_signed["targets"])
+    _delegations = delegations(_signed["delegations"])
+
+    _expires = expires(_signed["expires"])
+    check_type(_signed, "targets")
+
+    return Targets(_expires, _spec_version, version, _target_files, _delegations)
 
-    delegations, _expires = header(_signed, "targets", callback=get_delegations)
 
-    return Targets(_expires, _spec_version, version, _target_files, delegations)
+_SIGNED_PARSERS: Dict[str, Callable[[Json], Signed]] = {
+    "root": root,
+    "timestamp": timestamp,
+    "snapshot": snapshot,
+    "targets": targets,
+}
 
 
 def signed(_signed: Json) -> Signed:
+    check_dict(_signed)
+
     # Peek ahead.
     type = _signed.get("_type")
     if not type:
         raise TypeError(f"{_signed} has no type")
-    if type == "root":
-        return root(_signed)
-    elif type == "timestamp":
-        return timestamp(_signed)
-    elif type == "snapshot":
-        return snapshot(_signed)
-    elif type == "targets":
-        return targets(_signed)
-    else:
-        raise ValueError(f"{_signed} has unknown type {type}")
+    try:
+        parser = _SIGNED_PARSERS[type]
+    except (KeyError, TypeError):
+        raise ValueError(f"{_signed} has unknown type {type}") from None
+    return parser(_signed)
+
+
+_SIGNATURE_KEYS = frozenset({"keyid", "sig"})
 
 
 def signature(_signature: Json) -> Tuple[KeyID, Signature]:
-    check_dict(_signature)
+    check_keys(_signature, _SIGNATURE_KEYS)
 
-    k, sig = _signature.popitem()
-    check_key(k, "sig")
+    sig = _signature["sig"]
     check_str(sig)
 
-    k, keyid = _signature.popitem()
-    check_key(k, "keyid")
+    keyid = _signature["keyid"]
     check_str(keyid)
 
-    check_empty(_signature)
-    return keyid, sig
+    return keyid, bytes.fromhex(sig)
 
 
 def signatures(_signatures: List) -> Signatures:
     check_list(_signatures)
     keyids: Signatures = {}
 
-    while len(_signatures) > 0:
-        # NOTE: pop in order of appearance, so that we preserve order of key IDs.
-        _signature = _signatures.pop(0)
+    # NOTE: iterate in order of appearance, so that we preserve order of key IDs.
+    # We do not pop from the front of the list, which would be quadratic.
+    for _signature in _signatures:
         keyid, sig = signature(_signature)
-        sigs = keyids.setdefault(keyid, set())
-        sigs.add(sig)
+        if keyid in keyids:
+            raise ValueError(f"{keyid} has more than one signature")
+        keyids[keyid] = sig
 
     return keyids
 
 
+# NOTE: We often parse the same metadata file again (e.g., the trusted root, or
+# an unchanged timestamp on every refresh), so we remember the canonical
+# representation of its signed object by a digest of the whole file.
+_canonical_cache: LRUCache[bytes, bytes] = LRUCache(64)
+
+
+def cached_canonical(digest: bytes, _signed: Json) -> bytes:
+    """Like canonical, but cached by the digest of the file _signed is from."""
+    _canonical = _canonical_cache.get(digest)
+    if _canonical is None:
+        _canonical = canonical(_signed)
+        _canonical_cache.put(digest, _canonical)
+    return _canonical
+
+
+_METADATA_KEYS = frozenset({"signatures", "signed"})
+
+
 class JSONParser(Parser):
     @classmethod
     def parse(cls, d: Json) -> Metadata:
         """This method is used to try to parse any JSON dictionary containing TUF metadata.
 
-        It destructively reads the dictionary in reverse order of canonical sorting.
-        If the original dictionary must be preserved, be sure to pass in a copy.
-
-        We assume that keys are sorted in both input and output.
-        We have always output keys in this order.
-        In Python >= 3.7, this order is preserved in input thanks to ordered dict.
+        It reads the dictionary without modifying it, checking the keys of each
+        object in one pass before reading them directly, so the order of keys in
+        the input does not matter.
 
         It does NOT verify signatures. Be sure to verify signatures after parsing."""
-        check_dict(d)
+        return cls.__parse(d, canonical)
 
-        k, _signed = d.popitem()
-        check_key(k, "signed")
-        # NOTE: Before we destroy the signed object, build its canonical representation.
-        _canonical = canonical(_signed)
+    @classmethod
+    def parse_bytes(cls, data: bytes) -> Metadata:
+        """Like parse, but from the raw bytes of a JSON document, so that we can
+        reuse the canonical representation of metadata we have seen before."""
+        digest = hashlib.sha256(data).digest()
+        return cls.__parse(
+            loads(data), lambda _signed: cached_canonical(digest, _signed)
+        )
+
+    @classmethod
+    def __parse(cls, d: Json, _canonical: Callable[[Json], bytes]) -> Metadata:
+        check_keys(d, _METADATA_KEYS)
+
+        _signed = d["signed"]
+        _canonical_signed = _canonical(_signed)
         _signed = signed(_signed)
 
-        k, _signatures = d.popitem()
-        check_key(k, "signatures")
-        _signatures = signatures(_signatures)
+        _signatures = signatures(d["signatures"])
 
-        check_empty(d)
-        return Metadata(_canonical, _signatures, _signed)
+        return Metadata(_canonical_signed, _signatures, _signed)
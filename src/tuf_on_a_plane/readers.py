@@ -1,7 +1,9 @@
+import hashlib
+import hmac
+import mmap
 import os
-from typing import Iterable, Tuple
-
-from securesystemslib.util import get_file_hashes, load_json_file
+import stat
+from typing import Iterable, Tuple, Union
 
 from .models.common import (
     Filepath,
@@ -17,14 +19,55 @@ class ReaderMixIn:
     """A mixin to separate TUF metadata details such as filename extension and
     file format."""
 
+    HASH_CHUNK_SIZE = 2 ** 20
+
     def check_hashes(
         self,
         path: Filepath,
         expected: Hashes,
         hash_algorithms: Iterable[str] = ("sha256", "sha512"),
-    ) -> Hashes:
-        observed = get_file_hashes(path, hash_algorithms=hash_algorithms)
-        return observed == expected
+    ) -> bool:
+        # NOTE: We map the file instead of reading it, so that we hash slices of
+        # the page cache without copying them into new bytes objects.
+        with open(path, "rb") as f:
+            # mmap cannot map empty files.
+            if os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    if hasattr(mmap, "MADV_SEQUENTIAL"):
+                        m.madvise(mmap.MADV_SEQUENTIAL)
+                    return self.check_data_hashes(m, expected, hash_algorithms)
+        return self.check_data_hashes(b"", expected, hash_algorithms)
+
+    def check_data_hashes(
+        self,
+        data: Union[bytes, mmap.mmap],
+        expected: Hashes,
+        hash_algorithms: Iterable[str] = ("sha256", "sha512"),
+    ) -> bool:
+        # NOTE: We compute only the supported hashes that we expect, and all of
+        # them in a single pass over the data. We fail closed if there are none.
+        hashers = {
+            algorithm: hashlib.new(algorithm)
+            for algorithm in hash_algorithms
+            if algorithm in expected
+        }
+        if not hashers:
+            return False
+
+        with memoryview(data) as view:
+            for start in range(0, len(view), self.HASH_CHUNK_SIZE):
+                end = start + self.HASH_CHUNK_SIZE
+                with view[start:end] as chunk:
+                    for hasher in hashers.values():
+                        hasher.update(chunk)
+
+        # NOTE: compare_digest raises TypeError on str that is not ASCII, which
+        # no hex digest is, so such hashes simply do not match.
+        return all(
+            expected[algorithm].isascii()
+            and hmac.compare_digest(hasher.hexdigest(), expected[algorithm])
+            for algorithm, hasher in hashers.items()
+        )
 
     def check_length(self, path: Filepath, expected: Length) -> bool:
         # NOTE: check only upper bound, because we don't always know the exact
@@ -33,7 +76,11 @@ class ReaderMixIn:
         return Length(observed) <= expected
 
     def file_exists(self, path: Filepath) -> bool:
-        return os.path.isfile(path)
+        # NOTE: This is what os.path.isfile does, minus a Python-level call.
+        try:
+            return stat.S_ISREG(os.stat(path).st_mode)
+        except (OSError, ValueError):
+            return False
 
     def join_path(self, path: Filepath, *paths: Filepath) -> Filepath:
         return os.path.join(path, *paths)
@@ -42,9 +89,17 @@ class ReaderMixIn:
         """Return the expected filename based on the rolename."""
         raise NotImplementedError
 
+    def read_file(self, path: Filepath) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    def read_from_bytes(self, data: bytes) -> Metadata:
+        """Parse and return the Metadata from the contents of a file."""
+        raise NotImplementedError
+
     def read_from_file(self, path: Filepath) -> Metadata:
         """Read, parse, and return the Metadata from the file."""
-        raise NotImplementedError
+        return self.read_from_bytes(self.read_file(path))
 
     def split_path(self, path: Filepath) -> Tuple[Filepath, Filepath]:
         return os.path.split(path)
@@ -57,6 +112,6 @@ class JSONReaderMixIn(ReaderMixIn):
         """Return the expected filename based on the rolename."""
         return f"{rolename}.json"
 
-    def read_from_file(self, path: Filepath) -> Metadata:
-        """Return the expected filename based on the rolename."""
-        return JSONParser.parse(load_json_file(path))
+    def read_from_bytes(self, data: bytes) -> Metadata:
+        """Parse and return the Metadata from the contents of a JSON file."""
+        return JSONParser.parse_bytes(data)
@@ -1,10 +1,14 @@
+import asyncio
 from dataclasses import dataclass
-from fnmatch import fnmatch
-from typing import cast, Optional
+from typing import cast, Dict, Iterable, List, Optional
 from urllib.parse import urljoin
 
 from .config import Config
-from .download import DownloaderMixIn, HTTPXDownloaderMixIn
+from .download import (
+    AsyncHTTPXDownloaderMixIn,
+    DownloaderMixIn,
+    HTTPXDownloaderMixIn,
+)
 from .exceptions import (
     ArbitrarySoftwareAttack,
     DownloadNotFoundError,
@@ -65,6 +69,13 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
     def __init__(self, config: Config):
         super().init_downloader()
         self.config = config
+        # NOTE: The metadata cache does not change, and we look up the same few
+        # rolenames again and again, so we remember their local filenames.
+        self.__local_metadata_filenames: Dict[Rolename, Filepath] = {}
+        # NOTE: Remote metadata filenames are just versions and rolenames, which
+        # urljoin would resolve against the directory of metadata_root anyway,
+        # so we resolve that directory once, and then simply append to it.
+        self.__remote_metadata_dir: Url = urljoin(self.config.metadata_root, ".")
         self.__refresh()
 
     def close(self) -> None:
@@ -79,6 +90,12 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
         if not self.check_hashes(abspath, expected):
             raise ArbitrarySoftwareAttack(f"{abspath} != {expected}")
 
+    def __check_data_hashes(
+        self, abspath: Filepath, data: bytes, expected: Hashes
+    ) -> None:
+        if not self.check_data_hashes(data, expected):
+            raise ArbitrarySoftwareAttack(f"{abspath} != {expected}")
+
     def __check_length(self, abspath: Filepath, expected: Length) -> None:
         if not self.check_length(abspath, expected):
             raise EndlessDataAttack(f"{abspath} > {expected} bytes")
@@ -98,7 +115,13 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
             raise MixAndMatchAttack(f"{signed.version} != {timesnap.version}")
 
     def __local_metadata_filename(self, rolename: Rolename) -> Filepath:
-        return self.join_path(self.config.metadata_cache, self.role_filename(rolename))
+        filename = self.__local_metadata_filenames.get(rolename)
+        if filename is None:
+            filename = self.join_path(
+                self.config.metadata_cache, self.role_filename(rolename)
+            )
+            self.__local_metadata_filenames[rolename] = filename
+        return filename
 
     def __local_targets_filename(self, relpath: Filepath) -> Filepath:
         return self.join_path(self.config.targets_cache, relpath)
@@ -109,13 +132,13 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
         return f"{version.value}.{self.role_filename(rolename)}"
 
     def __remote_metadata_path(self, relpath: Filepath) -> Url:
-        return urljoin(self.config.metadata_root, relpath)
+        return self.__remote_metadata_dir + relpath
 
     def __remote_targets_path(self, relpath: Filepath, _hash: Hash) -> Url:
-        dirname, basename = self.split_path(relpath)
-        basename = f"{_hash}.{basename}"
-        relpath = self.join_path(dirname, basename)
-        return urljoin(self.config.targets_root, relpath)
+        # NOTE: This is a URL path, so we split it on "/" ourselves, instead of
+        # going through os.path, which may use another separator.
+        dirname, slash, basename = relpath.rpartition("/")
+        return urljoin(self.config.targets_root, f"{dirname}{slash}{_hash}.{basename}")
 
     def __refresh(self) -> None:
         """Refresh metadata for root, timestamp, and snapshot so that we have a
@@ -135,24 +158,23 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
         # the keys to verify itself in the first place.
         filename = self.__local_metadata_filename(self.ROOT_ROLENAME)
         metadata = self.read_from_file(filename)
-
-        # FIXME: the following line is purely to keep mypy happy; otherwise,
-        # it complains that the .signed.root attribute does not exist.
-        metadata.signed = cast(Root, metadata.signed)
+        # NOTE: cast only narrows the type for mypy; we bind it to a local
+        # instead of writing it back to the metadata.
+        signed = cast(Root, metadata.signed)
 
         # Verify self-signatures on previous root metadata file.
-        self.__check_signatures(metadata.signed.root, metadata)
+        self.__check_signatures(signed.root, metadata)
 
         # NOTE: the expiration of the trusted root metadata file does not
         # matter, because we will attempt to update it in the next step.
 
         # We do not support non-consistent-snapshot repositories.
-        if not metadata.signed.consistent_snapshot:
+        if not signed.consistent_snapshot:
             raise NoConsistentSnapshotsError
 
         # Now that we have verified signatures, throw them away, and set the
         # current root to the actual metadata of interest.
-        self.__root = metadata.signed
+        self.__root = signed
 
     def __update_root(self) -> None:
         """5.2. Update the root metadata file."""
@@ -165,7 +187,7 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
         # 5.2.8. Repeat steps 5.2.1 to 5.2.8.
         for _ in range(self.config.MAX_ROOT_ROTATIONS):
             # 5.2.2. Try downloading version N+1 of the root metadata file.
-            n += 1
+            n = Version(n + 1)
             remote_filename = self.__remote_metadata_filename(self.ROOT_ROLENAME, n)
             remote_path = self.__remote_metadata_path(remote_filename)
             try:
@@ -178,22 +200,20 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
 
             # 5.2.3. Check for an arbitrary software attack.
             metadata = self.read_from_file(tmp_file)
-            metadata.signed = cast(Root, metadata.signed)
+            signed = cast(Root, metadata.signed)
             self.__check_signatures(curr_root.root, metadata)
-            self.__check_signatures(metadata.signed.root, metadata)
+            self.__check_signatures(signed.root, metadata)
 
             # 5.2.4. Check for a rollback attack.
-            if metadata.signed.version != n:
-                raise RollbackAttack(
-                    f"{metadata.signed.version} != {n} in {remote_path}"
-                )
+            if signed.version != n:
+                raise RollbackAttack(f"{signed.version} != {n} in {remote_path}")
 
             # 5.2.5. Note that the expiration of the new (intermediate) root
             # metadata file does not matter yet.
 
             # 5.2.6. Set the trusted root metadata file to the new root metadata
             # file.
-            curr_root = metadata.signed
+            curr_root = signed
 
         # 5.2.9. Check for a freeze attack.
         self.__check_expiry(curr_root)
@@ -213,12 +233,10 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
                 or self.__root.snapshot != curr_root.snapshot
             ):
                 filename = self.__local_metadata_filename(self.SNAPSHOT_ROLENAME)
-                if self.file_exists(filename):
-                    self.rm_file(filename)
+                self.rm_file(filename, missing_ok=True)
 
                 filename = self.__local_metadata_filename(self.TIMESTAMP_ROLENAME)
-                if self.file_exists(filename):
-                    self.rm_file(filename)
+                self.rm_file(filename, missing_ok=True)
 
             # 5.2.7. Persist root metadata.
             # NOTE: We violate the spec in persisting only *after* checking
@@ -227,10 +245,12 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
             self.__root = curr_root
 
     def __get_prev_metadata(self, rolename: Rolename) -> Optional[Metadata]:
-        filename = self.__local_metadata_filename(rolename)
-        if self.file_exists(filename):
-            return self.read_from_file(filename)
-        return None
+        # NOTE: We just try to read the file, instead of first checking whether
+        # it exists, which would cost another stat.
+        try:
+            return self.read_from_file(self.__local_metadata_filename(rolename))
+        except FileNotFoundError:
+            return None
 
     def __update_timestamp(self) -> None:
         """5.3. Download the timestamp metadata file."""
@@ -243,24 +263,22 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
 
         # 5.3.1. Check for an arbitrary software attack.
         curr_metadata = self.read_from_file(tmp_file)
-        curr_metadata.signed = cast(Timestamp, curr_metadata.signed)
+        curr_signed = cast(Timestamp, curr_metadata.signed)
         self.__check_signatures(self.__root.timestamp, curr_metadata)
 
         # 5.3.2. Check for a rollback attack.
         prev_metadata = self.__get_prev_metadata(self.TIMESTAMP_ROLENAME)
         if prev_metadata:
-            prev_metadata.signed = cast(Timestamp, prev_metadata.signed)
-            self.__check_rollback(prev_metadata.signed, curr_metadata.signed)
-            self.__check_rollback(
-                prev_metadata.signed.snapshot, curr_metadata.signed.snapshot
-            )
+            prev_signed = cast(Timestamp, prev_metadata.signed)
+            self.__check_rollback(prev_signed, curr_signed)
+            self.__check_rollback(prev_signed.snapshot, curr_signed.snapshot)
 
         # 5.3.3. Check for a freeze attack.
-        self.__check_expiry(curr_metadata.signed)
+        self.__check_expiry(curr_signed)
 
         # 5.3.4. Persist timestamp metadata.
         self.mv_file(tmp_file, self.__local_metadata_filename(self.TIMESTAMP_ROLENAME))
-        self.__timestamp = curr_metadata.signed
+        self.__timestamp = curr_signed
 
     def __update_snapshot(self) -> None:
         """5.4. Download snapshot metadata file."""
@@ -283,38 +301,43 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
             tmp_file = self.download(remote_path, length, self.config)
 
         self.__check_length(tmp_file, length)
+        # NOTE: Read the file once, and then both hash and parse its contents.
+        data = self.read_file(tmp_file)
 
         # 5.4.1. Check against timestamp role's snapshot hash.
         if self.__timestamp.snapshot.hashes:
-            self.__check_hashes(tmp_file, self.__timestamp.snapshot.hashes)
+            self.__check_data_hashes(tmp_file, data, self.__timestamp.snapshot.hashes)
 
         # 5.4.2. Check for an arbitrary software attack.
-        curr_metadata = self.read_from_file(tmp_file)
-        curr_metadata.signed = cast(Snapshot, curr_metadata.signed)
+        curr_metadata = self.read_from_bytes(data)
+        curr_signed = cast(Snapshot, curr_metadata.signed)
         self.__check_signatures(self.__root.snapshot, curr_metadata)
 
         # 5.4.3. Check against timestamp role's snapshot version.
-        self.__check_version(curr_metadata.signed, self.__timestamp.snapshot)
+        self.__check_version(curr_signed, self.__timestamp.snapshot)
 
         # 5.4.4. Check for a rollback attack.
-        if prev_metadata:
-            prev_metadata.signed = cast(Snapshot, prev_metadata.signed)
-
-            for filename, prev_timesnap in prev_metadata.signed.targets.items():
-                curr_timesnap = curr_metadata.signed.targets.get(filename)
+        # NOTE: If the cached snapshot is not obsolete, then it is the very file
+        # we just checked, and cannot be a rollback of itself.
+        if prev_metadata and obsolete:
+            prev_signed = cast(Snapshot, prev_metadata.signed)
+            curr_timesnaps = curr_signed.targets
+
+            for filename, prev_timesnap in prev_signed.targets.items():
+                curr_timesnap = curr_timesnaps.get(filename)
                 if not curr_timesnap:
                     raise RollbackAttack(
-                        f"{filename} was in {prev_metadata.signed.version} but missing in {curr_metadata.signed.version}"
+                        f"{filename} was in {prev_signed.version} but missing in {curr_signed.version}"
                     )
                 self.__check_rollback(prev_timesnap, curr_timesnap)
 
         # 5.4.5. Check for a freeze attack.
-        self.__check_expiry(curr_metadata.signed)
+        self.__check_expiry(curr_signed)
 
         # 5.4.6. Persist snapshot metadata.
         if obsolete:
             self.mv_file(tmp_file, local_filename)
-        self.__snapshot = curr_metadata.signed
+        self.__snapshot = curr_signed
 
     def __preorder_dfs(
         self,
@@ -328,18 +351,16 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
             return target_file
         else:
             for rolename, delegation in targets.delegations.items():
-                if rolename not in visited:
-                    for path in delegation.paths:
-                        if fnmatch(target_relpath, path):
-                            target_file = self.__update_targets(
-                                visited,
-                                counter + 1,
-                                rolename,
-                                delegation.role,
-                                target_relpath,
-                            )
-                            if target_file or delegation.terminating:
-                                return target_file
+                if rolename not in visited and delegation.matches(target_relpath):
+                    target_file = self.__update_targets(
+                        visited,
+                        Positive(counter + 1),
+                        rolename,
+                        delegation.role,
+                        target_relpath,
+                    )
+                    if target_file or delegation.terminating:
+                        return target_file
             return None
 
     def __update_targets(
@@ -376,21 +397,23 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
             tmp_file = self.download(remote_path, length, self.config)
 
         self.__check_length(tmp_file, length)
+        # NOTE: Read the file once, and then both hash and parse its contents.
+        data = self.read_file(tmp_file)
 
         # 5.5.1. Check against snapshot role's targets hash.
         if timesnap.hashes:
-            self.__check_hashes(tmp_file, timesnap.hashes)
+            self.__check_data_hashes(tmp_file, data, timesnap.hashes)
 
         # 5.5.2. Check for an arbitrary software attack.
-        curr_metadata = self.read_from_file(tmp_file)
-        curr_metadata.signed = cast(Targets, curr_metadata.signed)
+        curr_metadata = self.read_from_bytes(data)
+        curr_signed = cast(Targets, curr_metadata.signed)
         self.__check_signatures(role, curr_metadata)
 
         # 5.5.3. Check against snapshot role's targets version.
-        self.__check_version(curr_metadata.signed, timesnap)
+        self.__check_version(curr_signed, timesnap)
 
         # 5.5.4. Check for a freeze attack.
-        self.__check_expiry(curr_metadata.signed)
+        self.__check_expiry(curr_signed)
 
         # 5.5.5. Persist targets metadata.
         if obsolete:
@@ -398,9 +421,7 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
 
         # 5.5.6. Perform a pre-order depth-first search for metadata about the
         # desired target, beginning with the top-level targets role.
-        return self.__preorder_dfs(
-            curr_metadata.signed, target_relpath, visited, counter
-        )
+        return self.__preorder_dfs(curr_signed, target_relpath, visited, counter)
 
     def __get_target(self, target_file: TargetFile, relpath: Filepath) -> Filepath:
         for _hash in target_file.hashes.values():
@@ -411,6 +432,32 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
                 continue
         raise InconsistentTargetError(f"{relpath}")
 
+    async def __aget_target(
+        self,
+        downloader: AsyncHTTPXDownloaderMixIn,
+        target_file: TargetFile,
+        relpath: Filepath,
+    ) -> Filepath:
+        for _hash in target_file.hashes.values():
+            remote_path = self.__remote_targets_path(relpath, _hash)
+            try:
+                return await downloader.download(
+                    remote_path, target_file.length, self.config
+                )
+            except DownloadNotFoundError:
+                continue
+        raise InconsistentTargetError(f"{relpath}")
+
+    def __install_target(
+        self, tmp_file: Filepath, local_path: Filepath, target_file: TargetFile
+    ) -> Target:
+        self.__check_length(tmp_file, target_file.length)
+        self.__check_hashes(tmp_file, target_file.hashes)
+
+        if tmp_file != local_path:
+            self.mv_file(tmp_file, local_path)
+        return Target(local_path, target_file)
+
     # FIXME: consider using a context manager for cleanup.
     def get(self, relpath: Filepath) -> Target:
         """Use this function to securely download and verify an update."""
@@ -433,12 +480,7 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
                 else:
                     tmp_file = self.__get_target(target_file, relpath)
 
-                self.__check_length(tmp_file, target_file.length)
-                self.__check_hashes(tmp_file, target_file.hashes)
-
-                if not file_exists:
-                    self.mv_file(tmp_file, local_path)
-                return Target(local_path, target_file)
+                return self.__install_target(tmp_file, local_path, target_file)
 
         except Exception as e:
             self.close()
@@ -450,9 +492,95 @@ class Repository(WriterMixIn, DownloaderMixIn, ReaderMixIn):
             self.close()
             raise TargetNotFoundError(f"{relpath}")
 
+    def __get_target_files(self, relpaths: List[Filepath]) -> List[TargetFile]:
+        # 5.6. Verify the desired targets against their targets metadata.
+        target_files: List[TargetFile] = []
+        for relpath in relpaths:
+            target_file = self.__update_targets(
+                set(), Positive(1), self.TARGETS_ROLENAME, self.__root.targets, relpath
+            )
+            # 5.6.1. If there is no targets metadata about a target, abort the
+            # update cycle and report that there is no such target.
+            if not target_file:
+                raise TargetNotFoundError(f"{relpath}")
+            target_files.append(target_file)
+        return target_files
+
+    def async_downloader(self) -> AsyncHTTPXDownloaderMixIn:
+        """Override this function to return an initialized async downloader for
+        aget_many."""
+        raise NotImplementedError
+
+    async def aget_many(self, relpaths: Iterable[Filepath]) -> List[Target]:
+        """Like get, but for many targets at once, which are returned in the
+        same order.
+
+        We look up all targets first, one at a time, because that updates the
+        metadata as it goes. Then we download those that are not cached yet
+        concurrently, so that waiting on the network overlaps.
+
+        NOTE: Like get, do not call this concurrently on the same repository:
+        every lookup updates the same metadata."""
+        relpaths = list(relpaths)
+        downloader = self.async_downloader()
+        try:
+            # NOTE: The lookups download metadata with the synchronous
+            # downloader, so we run them in a thread, instead of blocking the
+            # event loop until they are done.
+            target_files = await asyncio.to_thread(self.__get_target_files, relpaths)
+
+            # 5.6.2. Download the targets, and verify that their hashes match
+            # the targets metadata.
+            local_paths = [self.__local_targets_filename(r) for r in relpaths]
+
+            async def fetch(
+                relpath: Filepath, local_path: Filepath, target_file: TargetFile
+            ) -> Filepath:
+                # Download target only if not cached.
+                if self.file_exists(local_path):
+                    return local_path
+                return await self.__aget_target(downloader, target_file, relpath)
+
+            tasks = [
+                asyncio.create_task(fetch(*args))
+                for args in zip(relpaths, local_paths, target_files)
+            ]
+            try:
+                tmp_files = await asyncio.gather(*tasks)
+            except BaseException:
+                # NOTE: gather does not cancel the other downloads when one
+                # fails, so we do, and wait for them to finish, before we
+                # close the downloader and remove their temporary directory.
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+
+            return [
+                self.__install_target(*args)
+                for args in zip(tmp_files, local_paths, target_files)
+            ]
+
+        except Exception as e:
+            self.close()
+            raise TargetNotFoundError(f"{relpaths}") from e
+
+        finally:
+            await downloader.close_downloader()
+
+    def get_many(self, relpaths: Iterable[Filepath]) -> List[Target]:
+        """Like aget_many, but for callers that are not running an event loop.
+
+        NOTE: Do not call get concurrently from threads instead: every get
+        updates the same metadata."""
+        return asyncio.run(self.aget_many(relpaths))
+
 
 class JSONRepository(Repository, HTTPXDownloaderMixIn, JSONReaderMixIn):
     """Instantiate this class to read canonical JSON TUF metadata from a
     remote repository."""
 
-    pass
+    def async_downloader(self) -> AsyncHTTPXDownloaderMixIn:
+        downloader = AsyncHTTPXDownloaderMixIn()
+        downloader.init_downloader()
+        return downloader
@@ -1,3 +1,4 @@
+import errno
 import os
 import shutil
 
@@ -7,11 +8,32 @@ from .models.common import Filepath
 class WriterMixIn:
     """A mixin to separate details such as manipulating files."""
 
+    def __replace(self, src: Filepath, dst: Filepath) -> None:
+        # NOTE: Try an atomic rename first, without the extra stats that
+        # shutil.move does. Only when we cross filesystems (e.g., from a temp
+        # dir on tmpfs) do we let shutil.move copy, which uses os.sendfile
+        # where it can.
+        try:
+            os.replace(src, dst)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.move(src, dst)
+
     def mv_file(self, src: Filepath, dst: Filepath) -> None:
-        dst_dir = os.path.dirname(dst)
-        if not os.path.isdir(dst_dir):
-            os.makedirs(dst_dir, mode=0o700, exist_ok=True)
-        shutil.move(src, dst)
+        # NOTE: The destination directory almost always exists already, so we
+        # create it only after the move fails for lack of it.
+        try:
+            self.__replace(src, dst)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(dst), mode=0o700, exist_ok=True)
+            self.__replace(src, dst)
 
-    def rm_file(self, path: Filepath) -> None:
-        os.remove(path)
+    def rm_file(self, path: Filepath, missing_ok: bool = False) -> None:
+        """Like pathlib.Path.unlink, so that callers do not have to check whether
+        the file exists first."""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            if not missing_ok:
+                raise
@@ -0,0 +1,250 @@
+from datetime import datetime, timedelta, timezone
+import functools
+import hashlib
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+from pathlib import Path
+import shutil
+import threading
+from typing import Any, Dict, Iterator
+
+from nacl.signing import SigningKey
+import pytest
+
+from tuf_on_a_plane.models.common import Dir, Json
+from tuf_on_a_plane.parsers.json import canonical
+from tuf_on_a_plane.repository import Config, JSONRepository
+
+ORIG_METADATA_CACHE = "tests/data/repository/metadata"
+
+
+def pytest_configure(config) -> None:
+    config.addinivalue_line(
+        "markers", "e2e: talks to the live repository over the network"
+    )
+
+
+# NOTE: The caches and the repositories are module-scoped, so that every test
+# in a module shares a single refresh of the metadata, instead of each paying
+# for its own round trips.
+
+
+@pytest.fixture(scope="module")
+def metadata_cache(tmp_path_factory) -> Dir:
+    path = tmp_path_factory.mktemp("repository") / "metadata"
+    shutil.copytree(ORIG_METADATA_CACHE, path)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def targets_cache(tmp_path_factory) -> Dir:
+    return str(tmp_path_factory.mktemp("targets"))
+
+
+@pytest.fixture(scope="module")
+def repository(metadata_cache: Dir, targets_cache: Dir) -> Iterator[JSONRepository]:
+    c = Config(
+        "https://dd-integrations-core-wheels-build-stable.datadoghq.com/metadata.staged/",
+        "https://dd-integrations-core-wheels-build-stable.datadoghq.com/targets/",
+        metadata_cache,
+        targets_cache,
+    )
+    r = JSONRepository(c)
+    try:
+        yield r
+    finally:
+        r.close()
+
+
+class Key:
+    """An Ed25519 key to sign metadata for the local repository with."""
+
+    def __init__(self) -> None:
+        self.signing_key = SigningKey.generate()
+        self.public = {
+            "keyid_hash_algorithms": ["sha256", "sha512"],
+            "keytype": "ed25519",
+            "keyval": {"public": self.signing_key.verify_key.encode().hex()},
+            "scheme": "ed25519",
+        }
+        self.keyid = hashlib.sha256(canonical(self.public)).hexdigest()
+
+    def sign(self, signed: Json) -> Json:
+        sig = self.signing_key.sign(canonical(signed)).signature.hex()
+        return {"signatures": [{"keyid": self.keyid, "sig": sig}], "signed": signed}
+
+
+def hashes(data: bytes) -> Dict[str, str]:
+    return {
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "sha512": hashlib.sha512(data).hexdigest(),
+    }
+
+
+def write(path: Path, data: bytes) -> bytes:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return data
+
+
+def build_repository(path: Path) -> bytes:
+    """Writes a small repository with consistent snapshots, and a delegation,
+    under path, and returns its root metadata."""
+    metadata, targets = path / "metadata", path / "targets"
+    expires = datetime.now(timezone.utc) + timedelta(days=1)
+    common: Dict[str, Any] = {
+        "expires": expires.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "spec_version": "1.0.0",
+        "version": 1,
+    }
+    root_key, timestamp_key, snapshot_key, targets_key, in_toto_key = (
+        Key() for _ in range(5)
+    )
+
+    def role(key: Key) -> Json:
+        return {"keyids": [key.keyid], "threshold": 1}
+
+    def target(relpath: str, data: bytes) -> Json:
+        dirname, basename = os.path.split(relpath)
+        _hashes = hashes(data)
+        for _hash in _hashes.values():
+            write(targets / dirname / f"{_hash}.{basename}", data)
+        return {"hashes": _hashes, "length": len(data)}
+
+    def dump(filename: str, metadata_: Json) -> bytes:
+        return write(metadata / filename, json.dumps(metadata_).encode("utf-8"))
+
+    root = root_key.sign(
+        {
+            "_type": "root",
+            "consistent_snapshot": True,
+            "keys": {
+                key.keyid: key.public
+                for key in (root_key, timestamp_key, snapshot_key, targets_key)
+            },
+            "roles": {
+                "root": role(root_key),
+                "snapshot": role(snapshot_key),
+                "targets": role(targets_key),
+                "timestamp": role(timestamp_key),
+            },
+            **common,
+        }
+    )
+    root_bytes = dump("1.root.json", root)
+
+    in_toto_bytes = dump(
+        "1.in-toto.json",
+        in_toto_key.sign(
+            {
+                "_type": "targets",
+                "delegations": {"keys": {}, "roles": []},
+                "targets": {
+                    "in-toto-metadata/root.layout": target(
+                        "in-toto-metadata/root.layout", b"{}\n"
+                    )
+                },
+                **common,
+            }
+        ),
+    )
+    index = target("simple/index.html", b"<html></html>\n")
+    index["custom"] = {"in-toto": ["in-toto-metadata/root.layout"]}
+    dump(
+        "1.targets.json",
+        targets_key.sign(
+            {
+                "_type": "targets",
+                "delegations": {
+                    "keys": {in_toto_key.keyid: in_toto_key.public},
+                    "roles": [
+                        {
+                            "name": "in-toto",
+                            "paths": ["in-toto-metadata/*"],
+                            "terminating": True,
+                            **role(in_toto_key),
+                        }
+                    ],
+                },
+                "targets": {
+                    "simple/index.html": index,
+                    **{
+                        relpath: target(relpath, relpath.encode("utf-8"))
+                        for relpath in ("packages/a.tar.gz", "packages/b.tar.gz")
+                    },
+                },
+                **common,
+            }
+        ),
+    )
+    snapshot_bytes = dump(
+        "1.snapshot.json",
+        snapshot_key.sign(
+            {
+                "_type": "snapshot",
+                "meta": {
+                    "in-toto.json": {
+                        "hashes": hashes(in_toto_bytes),
+                        "length": len(in_toto_bytes),
+                        "version": 1,
+                    },
+                    "targets.json": {"version": 1},
+                },
+                **common,
+            }
+        ),
+    )
+    dump(
+        "timestamp.json",
+        timestamp_key.sign(
+            {
+                "_type": "timestamp",
+                "meta": {
+                    "snapshot.json": {
+                        "hashes": hashes(snapshot_bytes),
+                        "length": len(snapshot_bytes),
+                        "version": 1,
+                    }
+                },
+                **common,
+            }
+        ),
+    )
+    return root_bytes
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture(scope="module")
+def local_repository(tmp_path_factory) -> Iterator[JSONRepository]:
+    """Like repository, but against a repository that we generate and serve
+    ourselves, so that tests need neither the network nor its latency."""
+    remote = tmp_path_factory.mktemp("remote")
+    root = build_repository(remote)
+    handler = functools.partial(QuietHandler, directory=str(remote))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    metadata_cache = tmp_path_factory.mktemp("local") / "metadata"
+    write(metadata_cache / "root.json", root)
+    targets_cache = tmp_path_factory.mktemp("local-targets")
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        c = Config(
+            f"{url}/metadata/",
+            f"{url}/targets/",
+            str(metadata_cache),
+            str(targets_cache),
+        )
+        r = JSONRepository(c)
+        try:
+            yield r
+        finally:
+            r.close()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,20 @@
+from tuf_on_a_plane.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache: LRUCache[str, int] = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    # A hit makes "a" the most recently used, so "b" goes first.
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_lru_cache_keeps_false():
+    cache: LRUCache[str, bool] = LRUCache(1)
+    cache.put("a", False)
+    assert cache.get("a") is False
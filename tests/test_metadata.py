@@ -0,0 +1,93 @@
+import hashlib
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+import pytest
+
+from tuf_on_a_plane.models.metadata import (
+    Metadata,
+    Root,
+    ThresholdOfPublicKeys,
+    verify_ecdsa,
+    verify_rsa,
+)
+from tuf_on_a_plane.parsers.json import JSONParser, key
+
+ROOT_METADATA = "tests/data/repository/metadata/root.json"
+
+
+@pytest.fixture(scope="module")
+def root_metadata() -> Metadata:
+    with open(ROOT_METADATA, "rb") as f:
+        return JSONParser.parse_bytes(f.read())
+
+
+def tampered(sig: bytes) -> bytes:
+    return bytes([sig[0] ^ 1]) + sig[1:]
+
+
+def test_root_rsa_signatures_verify(root_metadata: Metadata):
+    root = root_metadata.signed
+    assert isinstance(root, Root)
+    data = root_metadata.canonical
+    digest = hashlib.sha256(data).digest()
+
+    signed_by = [
+        (pubkey, root_metadata.signatures[keyid])
+        for keyid, pubkey in root.root.pubkeys.items()
+        if keyid in root_metadata.signatures
+    ]
+    assert len(signed_by) >= root.root.threshold.value
+    for pubkey, sig in signed_by:
+        assert verify_rsa(pubkey, sig, data, digest)
+        assert not verify_rsa(pubkey, tampered(sig), data, digest)
+        tampered_data = data + b" "
+        tampered_digest = hashlib.sha256(tampered_data).digest()
+        assert not verify_rsa(pubkey, sig, tampered_data, tampered_digest)
+
+    assert root.root.verified(root_metadata.signatures, data)
+
+
+def test_root_threshold_fails_with_tampered_signatures(root_metadata: Metadata):
+    root = root_metadata.signed
+    assert isinstance(root, Root)
+    signatures = {
+        keyid: tampered(sig) for keyid, sig in root_metadata.signatures.items()
+    }
+    assert not root.root.verified(signatures, root_metadata.canonical)
+
+
+def test_threshold_verifies_in_parallel(root_metadata: Metadata):
+    root = root_metadata.signed
+    assert isinstance(root, Root)
+    # NOTE: The root role alone has too few keys to verify in parallel.
+    pubkeys = {**root.root.pubkeys, **root.snapshot.pubkeys, **root.targets.pubkeys}
+    threshold = ThresholdOfPublicKeys(root.root.threshold, pubkeys)
+    assert threshold.verified(root_metadata.signatures, root_metadata.canonical)
+    signatures = {
+        keyid: tampered(sig) for keyid, sig in root_metadata.signatures.items()
+    }
+    assert not threshold.verified(signatures, root_metadata.canonical)
+
+
+def test_ecdsa_signatures_verify():
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    public = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    pubkey = key(
+        {
+            "keyid_hash_algorithms": ["sha256", "sha512"],
+            "keytype": "ecdsa-sha2-nistp256",
+            "keyval": {"public": public.decode("utf-8")},
+            "scheme": "ecdsa-sha2-nistp256",
+        }
+    )
+    data = b'{"signed":"data"}'
+    digest = hashlib.sha256(data).digest()
+    sig = private_key.sign(data, ec.ECDSA(hashes.SHA256()))
+
+    assert verify_ecdsa(pubkey, sig, data, digest)
+    assert not verify_ecdsa(pubkey, tampered(sig), data, digest)
+    other = hashlib.sha256(data + b" ").digest()
+    assert not verify_ecdsa(pubkey, sig, data + b" ", other)
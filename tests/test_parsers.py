@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+import json
+
+import pytest
+from securesystemslib.formats import encode_canonical
+
+from tuf_on_a_plane.parsers.json import canonical, check_keys, expires, signatures
+
+ROOT_METADATA = "tests/data/repository/metadata/root.json"
+
+
+def load(path: str):
+    with open(path, "rb") as f:
+        return json.load(f)
+
+
+def test_canonical_matches_securesystemslib_on_root():
+    metadata = load(ROOT_METADATA)
+    for obj in (metadata["signed"], metadata):
+        assert canonical(obj) == encode_canonical(obj).encode("utf-8")
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        {},
+        {"a": []},
+        {"a": {}},
+        {"quote": 'say "hi"', "backslash": "C:\\path\\", "both": '\\"'},
+        {'"key"': 1, "back\\slash": 2},
+        {"newline": "a\nb", "tab": "a\tb", "unicode": "é ☃ \U0001f600"},
+        {"true": True, "false": False, "none": None},
+        {"ints": [0, -1, 1, 2 ** 64, -(2 ** 64)]},
+        {"b": 1, "a": 2, "c": {"z": [1, [2, [3, {"y": None}]]], "x": "x"}},
+        {"list": [1, "two", [3, [4, [5]]], {"six": 6}, True, None]},
+    ],
+)
+def test_canonical_matches_securesystemslib(obj):
+    assert canonical(obj) == encode_canonical(obj).encode("utf-8")
+
+
+@pytest.mark.parametrize("obj", [{"a": 1.0}, {"a": [0.0]}, {"a": [{"b": 2.5}]}])
+def test_canonical_rejects_floats(obj):
+    with pytest.raises(TypeError):
+        canonical(obj)
+
+
+def test_canonical_rejects_non_str_keys():
+    with pytest.raises(TypeError):
+        canonical({1: "one"})
+
+
+def test_check_keys():
+    expected, optional = frozenset({"a", "b"}), frozenset({"c"})
+    check_keys({"a": 1, "b": 2}, expected)
+    check_keys({"b": 2, "a": 1}, expected, optional)
+    check_keys({"a": 1, "b": 2, "c": 3}, expected, optional)
+    for d in ({"a": 1}, {"a": 1, "b": 2, "c": 3}, {"a": 1, "b": 2, "d": 4}):
+        with pytest.raises(ValueError):
+            check_keys(d, expected)
+    for d in ({"a": 1, "c": 3}, {"a": 1, "b": 2, "d": 4}):
+        with pytest.raises(ValueError):
+            check_keys(d, expected, optional)
+    with pytest.raises(TypeError):
+        check_keys([("a", 1), ("b", 2)], expected)
+
+
+def test_expires():
+    assert expires("2020-11-25T17:13:16Z") == datetime(
+        2020, 11, 25, 17, 13, 16, tzinfo=timezone.utc
+    )
+
+
+@pytest.mark.parametrize(
+    "_expires",
+    [
+        "2020-11-25T17:13:16",
+        "2020-11-25T17:13:16z",
+        "2020-11-25 17:13:16Z",
+        "2020-11-25T17:13:16+00:00",
+        "2020-11-25T17:13:16.5Z",
+        "2020-11-25T17:13Z",
+        "2020-13-25T17:13:16Z",
+        "2020-W01-1T000000.0Z",
+        "2020-11-25T17:13:1\u0661Z",
+    ],
+)
+def test_expires_rejects_other_formats(_expires):
+    with pytest.raises(ValueError):
+        expires(_expires)
+
+
+def test_signatures_rejects_duplicate_keyids():
+    keyid = "a" * 64
+    assert signatures([{"keyid": keyid, "sig": "00"}]) == {keyid: b"\x00"}
+    with pytest.raises(ValueError):
+        signatures([{"keyid": keyid, "sig": "00"}, {"keyid": keyid, "sig": "01"}])
@@ -0,0 +1,33 @@
+import hashlib
+
+import pytest
+
+from tuf_on_a_plane.readers import ReaderMixIn
+
+DATA = b"x" * (ReaderMixIn.HASH_CHUNK_SIZE + 1)
+
+
+@pytest.fixture
+def reader() -> ReaderMixIn:
+    return ReaderMixIn()
+
+
+def test_check_data_hashes(reader: ReaderMixIn):
+    expected = {
+        "sha256": hashlib.sha256(DATA).hexdigest(),
+        "sha512": hashlib.sha512(DATA).hexdigest(),
+    }
+    assert reader.check_data_hashes(DATA, expected)
+    assert not reader.check_data_hashes(DATA + b"x", expected)
+    assert not reader.check_data_hashes(DATA, {**expected, "sha512": "0" * 128})
+
+
+def test_check_data_hashes_fails_closed(reader: ReaderMixIn):
+    assert not reader.check_data_hashes(DATA, {})
+    assert not reader.check_data_hashes(
+        DATA, {"blake2b": hashlib.blake2b(DATA).hexdigest()}
+    )
+
+
+def test_check_data_hashes_rejects_non_ascii(reader: ReaderMixIn):
+    assert not reader.check_data_hashes(b"x", {"sha256": "é"})
@@ -1,46 +1,42 @@
+import asyncio
 import os
-import shutil
-import tempfile
+
+import pytest
 
 from tuf_on_a_plane.models.common import Filepath
-from tuf_on_a_plane.repository import Config, JSONRepository, Target
+from tuf_on_a_plane.repository import JSONRepository, Target
+
+
+def get(repository: JSONRepository, relpath: Filepath, depth: int = 0) -> None:
+    print((depth * "\t") + relpath)
+    t: Target = repository.get(relpath)
+    assert os.path.exists(t.path)
+    if t.target.custom:
+        paths = t.target.custom.get("in-toto")
+        if paths:
+            for path in paths:
+                get(repository, path, depth + 1)
+
+
+@pytest.mark.e2e
+def test_e2e_succeeds(repository: JSONRepository):
+    get(repository, "simple/index.html")
 
 
-def test_e2e_succeeds():
-    orig_metadata_cache = "tests/data/repository/metadata"
+def test_local_succeeds(local_repository: JSONRepository):
+    get(local_repository, "simple/index.html")
 
-    temp_metadata_cache = tempfile.TemporaryDirectory()
-    temp_targets_cache = tempfile.TemporaryDirectory()
 
-    shutil.copytree(orig_metadata_cache, temp_metadata_cache.name, dirs_exist_ok=True)
+def test_local_aget_many_succeeds(local_repository: JSONRepository):
+    relpaths = ["packages/a.tar.gz", "packages/b.tar.gz"]
+    targets = asyncio.run(local_repository.aget_many(relpaths))
+    for relpath, t in zip(relpaths, targets):
+        with open(t.path, "rb") as f:
+            assert f.read() == relpath.encode("utf-8")
 
-    c = Config(
-        "https://dd-integrations-core-wheels-build-stable.datadoghq.com/metadata.staged/",
-        "https://dd-integrations-core-wheels-build-stable.datadoghq.com/targets/",
-        temp_metadata_cache.name,
-        temp_targets_cache.name,
-    )
 
-    def get(relpath: Filepath, depth: int = 0) -> None:
-        print((depth * "\t") + relpath)
-        t: Target = r.get(relpath)
+def test_local_get_many_succeeds(local_repository: JSONRepository):
+    relpaths = ["simple/index.html", "in-toto-metadata/root.layout"]
+    for relpath, t in zip(relpaths, local_repository.get_many(relpaths)):
+        assert t.path.endswith(relpath)
         assert os.path.exists(t.path)
-        if t.target.custom:
-            paths = t.target.custom.get("in-toto")
-            if paths:
-                for path in paths:
-                    get(path, depth + 1)
-
-    try:
-        r = JSONRepository(c)
-    except Exception:
-        temp_metadata_cache.cleanup()
-        temp_targets_cache.cleanup()
-        raise
-    else:
-        try:
-            get("simple/index.html")
-        finally:
-            temp_metadata_cache.cleanup()
-            temp_targets_cache.cleanup()
-            r.close()